@@ -1,4 +1,19 @@
+import asyncio
+import functools
+import gc
+import hashlib
+import heapq
+import hmac
+import os
+import random
+import re
+import secrets
+import threading
+import time
 from abc import ABC, abstractmethod
+from array import array
+from collections import defaultdict
+from datetime import datetime
 from enum import Enum
 
 # -------------------------------
@@ -41,6 +56,7 @@ class Order:
         self.locker = None
         self.otp = None
         self.pickup_deadline = None  # Could be a datetime
+        self.expiry_seq = None  # ExpiryScheduler entry that is current for this order
 
 # -------------------------------
 # Locker and LockerLocation
@@ -51,20 +67,28 @@ class Locker:
         self.size = size
         self.state = LockerState.AVAILABLE
         self.assigned_order = None
+        self.location = None  # Set by LockerLocation.add_locker
 
     def assign_order(self, order: Order):
         if self.state != LockerState.AVAILABLE:
             raise Exception(f"Locker {self.locker_id} is not available")
         self.assigned_order = order
         self.state = LockerState.CLOSED  # Now assigned but not yet open
+        if self.location:
+            self.location.mark_unavailable(self)
 
     def validate_code(self, otp: str) -> bool:
         """
-        Validates the provided OTP against the order's OTP.
+        Validates the provided OTP against the order's OTP. If the locker's
+        location holds a hash of the OTP, the code is checked against that.
         """
         if self.assigned_order is None:
             return False
-        return self.assigned_order.otp == otp
+        if self.location:
+            otp_hash = self.location.otp_hashes.get(self.locker_id)
+            if otp_hash is not None:
+                return hmac.compare_digest(self.location.hash_otp(otp), otp_hash)
+        return otp is not None and self.assigned_order.otp == otp
 
     def open_with_code(self, otp: str):
         """
@@ -90,22 +114,682 @@ class Locker:
     def release_order(self):
         self.assigned_order = None
         self.state = LockerState.AVAILABLE
+        if self.location:
+            self.location.unregister_otp(self)
+            self.location.mark_available(self)
+
+class FreeLockerPool:
+    """
+    Set of free lockers of one size with O(1) add, remove and peek.
+    Lockers live in a list; removal swaps the last locker into the hole.
+    """
+    def __init__(self):
+        self._lockers = []
+        self._positions = {}  # locker_id -> index in self._lockers
+
+    def __len__(self):
+        return len(self._lockers)
+
+    def __contains__(self, locker: Locker):
+        return locker.locker_id in self._positions
+
+    def add(self, locker: Locker):
+        if locker.locker_id in self._positions:
+            return
+        self._positions[locker.locker_id] = len(self._lockers)
+        self._lockers.append(locker)
+
+    def remove(self, locker: Locker):
+        index = self._positions.pop(locker.locker_id, None)
+        if index is None:
+            return
+        last = self._lockers.pop()
+        if last is not locker:
+            self._lockers[index] = last
+            self._positions[last.locker_id] = index
+
+    def peek(self) -> Locker:
+        return self._lockers[-1] if self._lockers else None
 
 class LockerLocation:
-    def __init__(self, location_id: str, address: str):
+    def __init__(self, location_id: str, address: str, latitude: float = None, longitude: float = None):
         self.location_id = location_id
         self.address = address
+        self.latitude = latitude
+        self.longitude = longitude
         self.lockers = []  # List of Locker objects
+        self.lockers_by_id = {}  # locker_id -> Locker
+        self.free_lockers = {size: FreeLockerPool() for size in LockerSize}
+        self.capacity = {size: 0 for size in LockerSize}
+        self.otp_salt = os.urandom(16)
+        self.otp_index = {}  # OTP hash -> Locker
+        self.otp_hashes = {}  # locker_id -> OTP hash, for unregistering
 
     def add_locker(self, locker: Locker):
         self.lockers.append(locker)
+        self.capacity[locker.size] += 1
+        self.lockers_by_id[locker.locker_id] = locker
+        locker.location = self
+        if locker.state == LockerState.AVAILABLE:
+            self.mark_available(locker)
+
+    def mark_available(self, locker: Locker):
+        self.free_lockers[locker.size].add(locker)
+
+    def mark_unavailable(self, locker: Locker):
+        self.free_lockers[locker.size].remove(locker)
 
     def find_available_locker(self, size: LockerSize) -> Locker:
+        return self.free_lockers[size].peek()
+
+    def hash_otp(self, otp: str) -> bytes:
+        return hashlib.blake2b(otp.encode(), key=self.otp_salt, digest_size=16).digest()
+
+    def register_otp(self, locker: Locker, otp: str):
+        """
+        Indexes the locker under a salted hash of its OTP, so a code typed at
+        the kiosk resolves to its locker without the order id.
+        """
+        self.register_otp_hash(locker, self.hash_otp(otp))
+
+    def register_otp_hash(self, locker: Locker, otp_hash: bytes):
+        self.otp_index[otp_hash] = locker
+        self.otp_hashes[locker.locker_id] = otp_hash
+
+    def unregister_otp(self, locker: Locker):
+        otp_hash = self.otp_hashes.pop(locker.locker_id, None)
+        if otp_hash is not None:
+            self.otp_index.pop(otp_hash, None)
+
+    def find_locker_by_otp(self, otp: str) -> Locker:
+        return self.otp_index.get(self.hash_otp(otp))
+
+    def free_count(self, size: LockerSize) -> int:
+        return len(self.free_lockers[size])
+
+    def occupancy(self, size: LockerSize) -> float:
+        """
+        Fraction of lockers of this size that are in use.
+        """
+        capacity = self.capacity[size]
+        return (capacity - len(self.free_lockers[size])) / capacity if capacity else 0.0
+
+    def get_locker(self, locker_id: str) -> Locker:
+        return self.lockers_by_id.get(locker_id)
+
+    def occupied_lockers(self):
         for locker in self.lockers:
-            if locker.size == size and locker.state == LockerState.AVAILABLE:
+            if locker.assigned_order is not None:
+                yield locker
+
+# -------------------------------
+# Compact struct-of-arrays locker storage
+# -------------------------------
+LOCKER_SIZES = list(LockerSize)
+LOCKER_STATES = list(LockerState)
+
+class LockerView(Locker):
+    """
+    Locker backed by one slot of a CompactLockerLocation. Views are created on
+    demand and hold no state of their own; all Locker methods work unchanged.
+    """
+    __slots__ = ('_store', '_index')
+
+    def __init__(self, store, index: int):
+        self._store = store
+        self._index = index
+
+    @property
+    def locker_id(self) -> str:
+        return self._store.locker_id_at(self._index)
+
+    @property
+    def size(self) -> LockerSize:
+        return LOCKER_SIZES[self._store.sizes[self._index]]
+
+    @property
+    def state(self) -> LockerState:
+        return LOCKER_STATES[self._store.states[self._index]]
+
+    @state.setter
+    def state(self, state: LockerState):
+        self._store.states[self._index] = LOCKER_STATES.index(state)
+
+    @property
+    def assigned_order(self) -> Order:
+        return self._store.assigned_orders.get(self._index)
+
+    @assigned_order.setter
+    def assigned_order(self, order: Order):
+        if order is None:
+            self._store.assigned_orders.pop(self._index, None)
+        else:
+            self._store.assigned_orders[self._index] = order
+
+    @property
+    def location(self):
+        return self._store
+
+    def __eq__(self, other):
+        return isinstance(other, LockerView) and other._store is self._store and other._index == self._index
+
+    def __hash__(self):
+        return hash((id(self._store), self._index))
+
+class LockerViews:
+    """
+    Read-only sequence of LockerViews, standing in for LockerLocation.lockers.
+    """
+    def __init__(self, store):
+        self._store = store
+
+    def __len__(self):
+        return len(self._store.sizes)
+
+    def __getitem__(self, index: int) -> LockerView:
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("locker index out of range")
+        return LockerView(self._store, index)
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield LockerView(self._store, index)
+
+class IndexFreePool:
+    """
+    FreeLockerPool over locker indices. `positions` is shared by all pools of
+    a location since a locker is free in at most one of them.
+    """
+    def __init__(self, store):
+        self._store = store
+        self._indices = array('i')
+
+    def __len__(self):
+        return len(self._indices)
+
+    def __contains__(self, locker: LockerView):
+        return self._store.positions[locker._index] >= 0
+
+    def add(self, locker: LockerView):
+        self._add_index(locker._index)
+
+    def _add_index(self, index: int):
+        positions = self._store.positions
+        if positions[index] >= 0:
+            return
+        positions[index] = len(self._indices)
+        self._indices.append(index)
+
+    def remove(self, locker: LockerView):
+        positions = self._store.positions
+        index = locker._index
+        position = positions[index]
+        if position < 0:
+            return
+        positions[index] = -1
+        last = self._indices.pop()
+        if last != index:
+            self._indices[position] = last
+            positions[last] = position
+
+    def peek(self) -> LockerView:
+        return LockerView(self._store, self._indices[-1]) if self._indices else None
+
+class CompactLockerLocation(LockerLocation):
+    """
+    LockerLocation that keeps locker sizes, states and free-pool positions in
+    typed arrays (a few bytes per locker) instead of one Locker object each.
+    Lockers added with add_lockers are named "<location_id>-L<index>"; only
+    lockers added through add_locker keep their own id. Orders are held in a
+    dict that only has entries for occupied lockers.
+    """
+    def __init__(self, location_id: str, address: str, latitude: float = None, longitude: float = None):
+        super().__init__(location_id, address, latitude, longitude)
+        self.sizes = array('b')
+        self.states = array('b')
+        self.positions = array('i')
+        self.custom_ids = {}  # index -> locker_id, for lockers added via add_locker
+        self.custom_indices = {}  # locker_id -> index
+        self.assigned_orders = {}  # index -> Order
+        self.lockers = LockerViews(self)
+        self.free_lockers = {size: IndexFreePool(self) for size in LockerSize}
+
+    def locker_id_at(self, index: int) -> str:
+        return self.custom_ids.get(index) or f"{self.location_id}-L{index}"
+
+    def add_lockers(self, size: LockerSize, count: int):
+        start = len(self.sizes)
+        self.sizes.extend(array('b', [LOCKER_SIZES.index(size)]) * count)
+        self.states.extend(array('b', [LOCKER_STATES.index(LockerState.AVAILABLE)]) * count)
+        self.positions.extend(array('i', [-1]) * count)
+        self.capacity[size] += count
+        pool = self.free_lockers[size]
+        for index in range(start, start + count):
+            pool._add_index(index)
+
+    def add_locker(self, locker: Locker):
+        """
+        Copies a Locker into the arrays. Use the returned view from then on.
+        """
+        index = len(self.sizes)
+        self.sizes.append(LOCKER_SIZES.index(locker.size))
+        self.states.append(LOCKER_STATES.index(locker.state))
+        self.positions.append(-1)
+        self.capacity[locker.size] += 1
+        self.custom_ids[index] = locker.locker_id
+        self.custom_indices[locker.locker_id] = index
+        view = LockerView(self, index)
+        if locker.assigned_order is not None:
+            view.assigned_order = locker.assigned_order
+        if locker.state == LockerState.AVAILABLE:
+            self.mark_available(view)
+        return view
+
+    def get_locker(self, locker_id: str) -> LockerView:
+        index = self.custom_indices.get(locker_id)
+        if index is None:
+            prefix = f"{self.location_id}-L"
+            if not locker_id.startswith(prefix) or not locker_id[len(prefix):].isdigit():
+                return None
+            index = int(locker_id[len(prefix):])
+            if index >= len(self.sizes) or index in self.custom_ids:
+                return None
+        return LockerView(self, index)
+
+    def occupied_lockers(self):
+        for index in list(self.assigned_orders):
+            yield LockerView(self, index)
+
+# -------------------------------
+# Locker Allocation Strategies
+# -------------------------------
+class IAllocationStrategy(ABC):
+    @abstractmethod
+    def select(self, location: LockerLocation, size: LockerSize) -> Locker:
+        """
+        Returns a free locker for a package of `size`, or None to reject it.
+        """
+        pass
+
+class ExactFitStrategy(IAllocationStrategy):
+    def select(self, location: LockerLocation, size: LockerSize) -> Locker:
+        return location.find_available_locker(size)
+
+class BestFitUpgradeStrategy(IAllocationStrategy):
+    """
+    Uses the smallest free locker that is at least as large as the package.
+    """
+    def select(self, location: LockerLocation, size: LockerSize) -> Locker:
+        for candidate in LOCKER_SIZES[LOCKER_SIZES.index(size):]:
+            locker = location.find_available_locker(candidate)
+            if locker:
                 return locker
         return None
 
+class ReserveAwareStrategy(IAllocationStrategy):
+    """
+    Like BestFitUpgradeStrategy, but only upgrades into a larger size while
+    more than `reserve` of that size's lockers would stay free, so large
+    parcels are not locked out by upgraded small ones.
+    """
+    def __init__(self, reserve: float = 0.2):
+        self.reserve = reserve
+
+    def select(self, location: LockerLocation, size: LockerSize) -> Locker:
+        locker = location.find_available_locker(size)
+        if locker:
+            return locker
+        for candidate in LOCKER_SIZES[LOCKER_SIZES.index(size) + 1:]:
+            if location.free_count(candidate) - 1 >= self.reserve * location.capacity[candidate]:
+                return location.find_available_locker(candidate)
+        return None
+
+class LocationGeoIndex:
+    """
+    Uniform grid over (latitude, longitude). Nearest-location queries search
+    rings of cells outwards from the query cell and stop once no unvisited
+    ring can hold anything closer than the best match so far.
+    Distances are planar in degrees, which is fine for ranking nearby sites.
+    When the rings have covered more cells than there are occupied ones (no
+    free locker anywhere near), the rest of the search scans the occupied
+    cells directly instead.
+    """
+    def __init__(self, cell_size: float = 0.05):
+        self.cell_size = cell_size
+        self.cells = {}  # (row, col) -> list of LockerLocation
+        self.min_cell = None
+        self.max_cell = None
+
+    def _cell(self, latitude: float, longitude: float):
+        return (int(latitude // self.cell_size), int(longitude // self.cell_size))
+
+    def add(self, location: LockerLocation):
+        if location.latitude is None or location.longitude is None:
+            return
+        cell = self._cell(location.latitude, location.longitude)
+        self.cells.setdefault(cell, []).append(location)
+        if self.min_cell is None:
+            self.min_cell, self.max_cell = cell, cell
+        else:
+            self.min_cell = (min(self.min_cell[0], cell[0]), min(self.min_cell[1], cell[1]))
+            self.max_cell = (max(self.max_cell[0], cell[0]), max(self.max_cell[1], cell[1]))
+
+    def remove(self, location: LockerLocation):
+        if location.latitude is None or location.longitude is None:
+            return
+        cell = self._cell(location.latitude, location.longitude)
+        bucket = self.cells.get(cell, [])
+        if location in bucket:
+            bucket.remove(location)
+            if not bucket:
+                del self.cells[cell]
+
+    def _ring(self, center, radius: int):
+        row, col = center
+        if radius == 0:
+            yield center
+            return
+        for c in range(col - radius, col + radius + 1):
+            yield (row - radius, c)
+            yield (row + radius, c)
+        for r in range(row - radius + 1, row + radius):
+            yield (r, col - radius)
+            yield (r, col + radius)
+
+    def nearest_with_free_locker(self, latitude: float, longitude: float, size: LockerSize) -> LockerLocation:
+        if not self.cells:
+            return None
+        center = self._cell(latitude, longitude)
+        max_radius = max(abs(center[0] - self.min_cell[0]), abs(center[0] - self.max_cell[0]),
+                         abs(center[1] - self.min_cell[1]), abs(center[1] - self.max_cell[1]))
+        best, best_dist = None, float('inf')
+        visited = 0
+        for radius in range(max_radius + 1):
+            # anything in this ring or beyond is at least (radius - 1) cells away
+            if best is not None and best_dist <= (radius - 1) * self.cell_size:
+                break
+            if visited > len(self.cells):
+                return self._scan(latitude, longitude, size)
+            for cell in self._ring(center, radius):
+                visited += 1
+                for location in self.cells.get(cell, ()):
+                    if not location.free_lockers[size]:
+                        continue
+                    dist = ((location.latitude - latitude) ** 2 + (location.longitude - longitude) ** 2) ** 0.5
+                    if dist < best_dist:
+                        best, best_dist = location, dist
+        return best
+
+    def _scan(self, latitude: float, longitude: float, size: LockerSize) -> LockerLocation:
+        best, best_dist = None, float('inf')
+        for bucket in self.cells.values():
+            for location in bucket:
+                if not location.free_lockers[size]:
+                    continue
+                dist = ((location.latitude - latitude) ** 2 + (location.longitude - longitude) ** 2) ** 0.5
+                if dist < best_dist:
+                    best, best_dist = location, dist
+        return best
+
+# -------------------------------
+# Pickup deadline expiry
+# -------------------------------
+class ExpiryScheduler:
+    """
+    Min-heap of (pickup_deadline, seq, order). Scheduling and expiring cost
+    O(log n). Entries are not removed on pickup; pop_expired skips any order
+    that no longer holds a locker, and any entry superseded by a later
+    schedule() of the same order (e.g. a pickup followed by a return).
+    """
+    def __init__(self):
+        self._heap = []
+        self._seq = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._heap)
+
+    def schedule(self, order: Order):
+        with self._lock:
+            self._seq += 1
+            order.expiry_seq = self._seq
+            heapq.heappush(self._heap, (order.pickup_deadline, self._seq, order))
+
+    def pop_expired(self, now: datetime) -> list:
+        expired = []
+        with self._lock:
+            heap = self._heap
+            while heap and heap[0][0] <= now:
+                deadline, seq, order = heapq.heappop(heap)
+                if order.locker is not None and order.expiry_seq == seq and order.pickup_deadline == deadline:
+                    expired.append(order)
+        return expired
+
+# -------------------------------
+# Persistence: write-ahead journal and snapshots
+# -------------------------------
+class LockerJournal:
+    """
+    Append-only journal of locker events (assign/open/close/release) plus a
+    periodic snapshot of every occupied locker, both in `directory`. Each
+    event is one line of tab-separated fields, which replays several times
+    faster than JSON. Events are buffered and written with one fsync per
+    `group_size` events (group commit). A background thread also writes
+    the batch once its oldest event is `max_delay` seconds old, so in quiet
+    periods an event is durable within that delay rather than whenever the
+    group fills up. Up to that much can be lost on a crash unless flush()
+    is called.
+
+    OTPs are journaled only as the location's salted hash. Each file holds
+    the salt of a location before its first assign, so a recovered service
+    keeps accepting codes sent before the restart.
+
+    Replay needs the locations and lockers to be configured already; it
+    only restores which order sits in which locker and in what state.
+    """
+    SNAPSHOT = "snapshot.log"
+    JOURNAL = "journal.log"
+    _ESCAPES = {"\\": "\\\\", "\t": "\\t", "\n": "\\n"}
+    _UNESCAPE = re.compile(r"\\(.)")
+    _UNESCAPES = {"\\": "\\", "t": "\t", "n": "\n"}
+
+    def __init__(self, directory: str, group_size: int = 1000, max_delay: float = 0.05):
+        self.directory = directory
+        self.group_size = group_size
+        self.max_delay = max_delay
+        self.snapshot_path = os.path.join(directory, self.SNAPSHOT)
+        self.journal_path = os.path.join(directory, self.JOURNAL)
+        os.makedirs(directory, exist_ok=True)
+        self._pending = []
+        self._oldest = None  # time.monotonic() of the first pending event
+        self._lock = threading.Lock()
+        self._wakeup = threading.Condition(self._lock)
+        self._closed = False
+        self._salted = set()  # location ids whose salt is in the current journal
+        self._file = open(self.journal_path, "a", encoding="utf-8", newline="\n")
+        self._flusher = threading.Thread(target=self._flush_on_delay, name="journal-flusher", daemon=True)
+        self._flusher.start()
+
+    @classmethod
+    def _encode(cls, fields: list) -> str:
+        line = "\t".join(fields)
+        if "\\" in line or "\n" in line or line.count("\t") != len(fields) - 1:
+            line = "\t".join("".join(cls._ESCAPES.get(ch, ch) for ch in field) for field in fields)
+        return line
+
+    @classmethod
+    def _decode(cls, line: str) -> list:
+        fields = line.split("\t")
+        if "\\" in line:
+            fields = [cls._UNESCAPE.sub(lambda m: cls._UNESCAPES.get(m.group(1), m.group(1)), field)
+                      for field in fields]
+        return fields
+
+    @staticmethod
+    def assign_event(order: Order) -> list:
+        locker = order.locker
+        location = locker.location
+        deadline = order.pickup_deadline
+        return ["assign", location.location_id, locker.locker_id,
+                order.order_id, order.customer.name, order.customer.phone,
+                order.package.package_id, order.package.size.name,
+                location.otp_hashes[locker.locker_id].hex(),
+                deadline.isoformat() if deadline else ""]
+
+    @staticmethod
+    def salt_event(location) -> list:
+        return ["salt", location.location_id, location.otp_salt.hex()]
+
+    @staticmethod
+    def locker_event(kind: str, locker: Locker) -> list:
+        return [kind, locker.location.location_id, locker.locker_id]
+
+    def record_assign(self, order: Order):
+        """
+        Records an assign event, preceded by the location's salt the first
+        time the location appears in the current journal.
+        """
+        location = order.locker.location
+        with self._lock:
+            if location.location_id not in self._salted:
+                self._salted.add(location.location_id)
+                self._append(self.salt_event(location))
+            self._append(self.assign_event(order))
+
+    def record(self, event: list):
+        with self._lock:
+            self._append(event)
+
+    def _append(self, event: list):
+        self._pending.append(self._encode(event))
+        if len(self._pending) >= self.group_size:
+            self._write_pending()
+        elif self._oldest is None:
+            self._oldest = time.monotonic()
+            self._wakeup.notify()
+
+    def _write_pending(self):
+        if self._pending:
+            self._pending.append("")
+            self._file.write("\n".join(self._pending))
+            self._pending = []
+        self._oldest = None
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def _flush_on_delay(self):
+        with self._lock:
+            while not self._closed:
+                if self._oldest is None:
+                    self._wakeup.wait()
+                    continue
+                remaining = self._oldest + self.max_delay - time.monotonic()
+                if remaining > 0:
+                    self._wakeup.wait(remaining)
+                else:
+                    self._write_pending()
+
+    def flush(self):
+        with self._lock:
+            self._write_pending()
+
+    def close(self):
+        with self._lock:
+            self._write_pending()
+            self._closed = True
+            self._wakeup.notify()
+        self._flusher.join()
+        self._file.close()
+
+    def write_snapshot(self, service):
+        """
+        Writes the state of every occupied locker and truncates the journal.
+        The caller must keep the service quiet while this runs.
+        """
+        with self._lock:
+            self._write_pending()
+            tmp_path = self.snapshot_path + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8", newline="\n") as snapshot:
+                lines = []
+                for location in service.locker_locations.values():
+                    lines.append(self._encode(self.salt_event(location)))
+                    for locker in location.occupied_lockers():
+                        lines.append(self._encode(self.assign_event(locker.assigned_order)))
+                        if locker.state == LockerState.OPEN:
+                            lines.append(self._encode(self.locker_event("open", locker)))
+                        if len(lines) >= 10000:
+                            lines.append("")
+                            snapshot.write("\n".join(lines))
+                            lines = []
+                lines.append("")
+                snapshot.write("\n".join(lines))
+                snapshot.flush()
+                os.fsync(snapshot.fileno())
+            os.replace(tmp_path, self.snapshot_path)
+            self._file.close()
+            self._file = open(self.journal_path, "w", encoding="utf-8", newline="\n")
+            self._salted = set()
+
+    def replay(self, service) -> dict:
+        """
+        Applies the snapshot and then the journal to `service`. Returns the
+        restored orders that still hold a locker, keyed by order id.
+        """
+        orders = {}
+        gc_was_enabled = gc.isenabled()
+        gc.disable()  # replay allocates millions of long-lived objects
+        try:
+            for path in (self.snapshot_path, self.journal_path):
+                if not os.path.exists(path):
+                    continue
+                with open(path, encoding="utf-8", newline="\n") as events:
+                    for line in events:
+                        line = line.rstrip("\n")
+                        if line:
+                            self._apply(service, self._decode(line), orders)
+        finally:
+            if gc_was_enabled:
+                gc.enable()
+        for order in orders.values():
+            if order.pickup_deadline is not None:
+                service.expiry_scheduler.schedule(order)
+        return orders
+
+    def _apply(self, service, event: list, orders: dict):
+        kind, location_id, locker_id = event[0], event[1], event[2]
+        location = service.find_locker_location(location_id)
+        if kind == "salt":
+            if location is not None:
+                location.otp_salt = bytes.fromhex(event[2])
+            return
+        locker = location.get_locker(locker_id) if location else None
+        if locker is None:
+            print(f"Skipping journal event for unknown locker {location_id}/{locker_id}")
+            return
+        if kind == "assign":
+            order_id, name, phone, package_id, size, otp_hash, deadline = event[3:]
+            current = locker.assigned_order
+            if current is not None and current.order_id == order_id:
+                return
+            if current is not None:
+                orders.pop(current.order_id, None)
+                locker.release_order()
+            order = Order(order_id, Customer(name, phone), Package(package_id, LockerSize[size]))
+            if deadline:
+                order.pickup_deadline = datetime.fromisoformat(deadline)
+            locker.assign_order(order)
+            order.locker = locker
+            location.register_otp_hash(locker, bytes.fromhex(otp_hash))
+            orders[order_id] = order
+        elif kind == "open":
+            locker.state = LockerState.OPEN
+        elif kind in ("close", "release"):
+            if locker.assigned_order is not None:
+                orders.pop(locker.assigned_order.order_id, None)
+            locker.release_order()
+
 # -------------------------------
 # Notification Interface and Implementation
 # -------------------------------
@@ -118,114 +802,526 @@ class INotifier(ABC):
     def generate_otp(self) -> str:
         pass
 
+    def send_otp_batch(self, messages: list):
+        """
+        Sends a batch of (phone, otp, message) tuples. Notifiers that can talk
+        to their gateway in bulk should override this.
+        """
+        for phone, otp, message in messages:
+            self.send_otp(phone, otp, message)
+
 class OTPService(INotifier):
+    def __init__(self, digits: int = 6):
+        self.digits = digits
+
     def send_otp(self, phone: str, otp: str, message: str):
         print(f"Sending OTP {otp} to {phone}: {message}")
 
     def generate_otp(self) -> str:
-        # In a real system, this would generate a random OTP.
-        return "123456"
+        return f"{secrets.randbelow(10 ** self.digits):0{self.digits}d}"
+
+# -------------------------------
+# Asynchronous OTP delivery over a pluggable transport
+# -------------------------------
+class IOTPTransport(ABC):
+    """
+    Connection-oriented channel to an SMS gateway. A connection returned by
+    connect() is reused for many sends until a send fails.
+    """
+    @abstractmethod
+    async def connect(self):
+        pass
+
+    @abstractmethod
+    async def send(self, connection, phone: str, message: str):
+        pass
+
+    async def close(self, connection):
+        pass
+
+class FakeSMSGateway(IOTPTransport):
+    """
+    Local stand-in for an SMS gateway with configurable latency and failure rate.
+    """
+    def __init__(self, latency: float = 0.05, failure_rate: float = 0.0, seed: int = None):
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self.rng = random.Random(seed)
+        self.connections_opened = 0
+        self.sent = []
+
+    async def connect(self):
+        self.connections_opened += 1
+        await asyncio.sleep(self.latency)
+        return self.connections_opened
+
+    async def send(self, connection, phone: str, message: str):
+        await asyncio.sleep(self.latency)
+        if self.rng.random() < self.failure_rate:
+            raise ConnectionError(f"gateway dropped message to {phone}")
+        self.sent.append((phone, message))
+
+class AsyncOTPService(OTPService):
+    """
+    Notifier that queues OTPs and delivers them from an asyncio event loop
+    running on a background thread, so send_otp returns without waiting on
+    the gateway. `concurrency` workers each hold one reused transport
+    connection; failed sends are retried with exponential backoff. At most
+    `max_queue` messages may be pending, after which send_otp blocks.
+    """
+    def __init__(self, transport: IOTPTransport, concurrency: int = 8, max_queue: int = 10000,
+                 max_retries: int = 3, backoff: float = 0.1, digits: int = 6):
+        super().__init__(digits)
+        self.transport = transport
+        self.concurrency = concurrency
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.delivered = 0
+        self.failed = 0
+        self._slots = threading.BoundedSemaphore(max_queue)
+        self._loop = asyncio.new_event_loop()
+        self._ready = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        self._ready.wait()
+
+    def _run(self):
+        asyncio.set_event_loop(self._loop)
+        self._queue = asyncio.Queue()
+        self._workers = [self._loop.create_task(self._worker()) for _ in range(self.concurrency)]
+        self._ready.set()
+        self._loop.run_forever()
+
+    async def _worker(self):
+        connection = None
+        try:
+            while True:
+                phone, message = await self._queue.get()
+                try:
+                    connection = await self._deliver(connection, phone, message)
+                finally:
+                    self._queue.task_done()
+                    self._slots.release()
+        finally:
+            if connection is not None:
+                await self.transport.close(connection)
+
+    async def _deliver(self, connection, phone: str, message: str):
+        for attempt in range(self.max_retries + 1):
+            try:
+                if connection is None:
+                    connection = await self.transport.connect()
+                await self.transport.send(connection, phone, message)
+                self.delivered += 1
+                return connection
+            except Exception as e:
+                if connection is not None:
+                    await self.transport.close(connection)
+                    connection = None
+                if attempt == self.max_retries:
+                    self.failed += 1
+                    print(f"Giving up on OTP to {phone}: {e}")
+                    return None
+                await asyncio.sleep(self.backoff * 2 ** attempt)
+
+    def send_otp(self, phone: str, otp: str, message: str):
+        self._slots.acquire()
+        self._loop.call_soon_threadsafe(self._queue.put_nowait, (phone, f"{message} OTP: {otp}"))
+
+    def flush(self):
+        """
+        Blocks until every queued OTP has been delivered or given up on.
+        """
+        asyncio.run_coroutine_threadsafe(self._queue.join(), self._loop).result()
+
+    def close(self):
+        self.flush()
+
+        async def stop_workers():
+            for worker in self._workers:
+                worker.cancel()
+            await asyncio.gather(*self._workers, return_exceptions=True)
+
+        asyncio.run_coroutine_threadsafe(stop_workers(), self._loop).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._loop.close()
+
+# -------------------------------
+# Instrumentation: counters, latency histograms and span hooks
+# -------------------------------
+class LatencyHistogram:
+    """
+    Latency histogram with power-of-two microsecond buckets: bucket i counts
+    samples below 2**i us. Recording is a bit_length call and an increment.
+    """
+    BUCKETS = 32
+
+    def __init__(self):
+        self.counts = [0] * self.BUCKETS
+        self.count = 0
+        self.total = 0.0
+
+    def record(self, seconds: float):
+        bucket = min(int(seconds * 1e6).bit_length(), self.BUCKETS - 1)
+        self.counts[bucket] += 1
+        self.count += 1
+        self.total += seconds
+
+    def percentile(self, p: float) -> float:
+        """
+        Upper bound, in seconds, of the bucket holding the p-th percentile.
+        """
+        target = p * self.count
+        seen = 0
+        for bucket, count in enumerate(self.counts):
+            seen += count
+            if count and seen >= target:
+                return (1 << bucket) / 1e6
+        return 0.0
+
+class ServiceMetrics:
+    """
+    Counters and per-operation latency histograms for AmazonLockerService.
+    `span_hook`, if given, is called as span_hook(operation, start, duration,
+    result) after every instrumented call, e.g. to feed a tracer.
+    """
+    def __init__(self, span_hook=None):
+        self.span_hook = span_hook
+        self.counters = defaultdict(int)  # (name, label) -> count
+        self.latencies = defaultdict(LatencyHistogram)  # operation -> histogram
+        self._lock = threading.Lock()
+
+    def increment(self, name: str, label=None, amount: int = 1):
+        with self._lock:
+            self.counters[(name, label)] += amount
+
+    def observe(self, operation: str, start: float, duration: float, result):
+        with self._lock:
+            self.latencies[operation].record(duration)
+        if self.span_hook:
+            self.span_hook(operation, start, duration, result)
+
+    def report(self) -> dict:
+        with self._lock:
+            counters = dict(self.counters)
+            for operation, hist in self.latencies.items():
+                counters[("calls", operation)] = hist.count
+            return {
+                "counters": counters,
+                "latency": {
+                    operation: {"count": hist.count, "mean": hist.total / hist.count,
+                                "p50": hist.percentile(0.5), "p99": hist.percentile(0.99)}
+                    for operation, hist in self.latencies.items() if hist.count
+                },
+            }
+
+def timed(operation: str, method, metrics: ServiceMetrics):
+    """
+    Wraps a bound method so every call is timed into `metrics`.
+    """
+    @functools.wraps(method)
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        result = method(*args, **kwargs)
+        metrics.observe(operation, start, time.perf_counter() - start, result)
+        return result
+    return wrapper
 
 # -------------------------------
 # Singleton Implementation Using a Metaclass
 # -------------------------------
 class SingletonMeta(type):
     _instances = {}
+    _lock = threading.Lock()
     def __call__(cls, *args, **kwargs):
         if cls not in cls._instances:
-            instance = super().__call__(*args, **kwargs)
-            cls._instances[cls] = instance
+            with cls._lock:
+                if cls not in cls._instances:
+                    instance = super().__call__(*args, **kwargs)
+                    cls._instances[cls] = instance
         return cls._instances[cls]
 
 # -------------------------------
 # AmazonLockerService: The Central Service (Singleton)
 # -------------------------------
 class AmazonLockerService(metaclass=SingletonMeta):
-    def __init__(self, notifier: INotifier):
+    """
+    Assignment, pickup and return are atomic per location: every location id
+    hashes onto one of `lock_stripes` locks, so requests for different
+    locations mostly run in parallel. OTPs are sent after the lock is released.
+    """
+    OTP_ATTEMPTS = 20
+    INSTRUMENTED_OPERATIONS = ("assign_locker_for_order", "assign_lockers_bulk", "process_return",
+                               "pickup_order", "pickup_by_code")
+    def __init__(self, notifier: INotifier, lock_stripes: int = 64,
+                 allocation_strategy: IAllocationStrategy = None):
         if not hasattr(self, 'initialized'):
             self.notifier = notifier
-            self.locker_locations = []  # List of LockerLocation objects
+            self.allocation_strategy = allocation_strategy or ExactFitStrategy()
+            self.locker_locations = {}  # location_id -> LockerLocation
+            self.geo_index = LocationGeoIndex()
+            self._registry_lock = threading.Lock()
+            self._location_locks = [threading.Lock() for _ in range(lock_stripes)]
+            self.expiry_scheduler = ExpiryScheduler()
+            self.journal = None
+            self.metrics = None  # set through enable_metrics()
             self.initialized = True
 
+    def _lock_for(self, location_id: str) -> threading.Lock:
+        return self._location_locks[hash(location_id) % len(self._location_locks)]
+
+    def enable_metrics(self, metrics: ServiceMetrics):
+        """
+        Starts recording into `metrics`. The hot-path methods are shadowed on
+        the instance by timed wrappers, so while metrics are disabled the
+        service runs the plain methods with no instrumentation cost at all.
+        """
+        self.disable_metrics()
+        self.metrics = metrics
+        for name in self.INSTRUMENTED_OPERATIONS:
+            setattr(self, name, timed(name, getattr(self, name), metrics))
+
+    def disable_metrics(self):
+        self.metrics = None
+        for name in self.INSTRUMENTED_OPERATIONS:
+            self.__dict__.pop(name, None)
+
+    def _reject(self, location_id: str, reason: str, message, count: int = 1):
+        print(message)
+        if self.metrics:
+            self.metrics.increment("rejections", (location_id, reason), count)
+
+    def attach_journal(self, journal: LockerJournal):
+        self.journal = journal
+
+    def recover(self) -> dict:
+        """
+        Restores locker assignments from the attached journal. Call after all
+        locations have been added and before serving requests.
+        """
+        return self.journal.replay(self)
+
+    def checkpoint(self):
+        """
+        Writes a snapshot through the attached journal while holding every
+        location lock, then starts a fresh journal.
+        """
+        for lock in self._location_locks:
+            lock.acquire()
+        try:
+            self.journal.write_snapshot(self)
+        finally:
+            for lock in self._location_locks:
+                lock.release()
+
     def add_locker_location(self, location: LockerLocation):
-        self.locker_locations.append(location)
+        with self._registry_lock:
+            previous = self.locker_locations.get(location.location_id)
+            if previous:
+                self.geo_index.remove(previous)
+            self.locker_locations[location.location_id] = location
+            self.geo_index.add(location)
 
     def find_locker_location(self, location_id: str) -> LockerLocation:
-        for loc in self.locker_locations:
-            if loc.location_id == location_id:
-                return loc
-        return None
+        return self.locker_locations.get(location_id)
 
-    def assign_locker_for_order(self, order: Order, location_id: str) -> bool:
+    def find_nearest_location(self, latitude: float, longitude: float, size: LockerSize) -> LockerLocation:
+        """
+        Returns the closest location that has a free locker of the given size.
+        """
+        with self._registry_lock:
+            return self.geo_index.nearest_with_free_locker(latitude, longitude, size)
+
+    def _reserve_locker(self, order: Order, location_id: str) -> bool:
+        """
+        Finds a free locker for the order and assigns it under the location lock.
+        """
         location = self.find_locker_location(location_id)
         if not location:
-            print(f"Location {location_id} not found")
+            self._reject(location_id, "location_not_found", f"Location {location_id} not found")
             return False
 
-        locker = location.find_available_locker(order.package.size)
-        if not locker:
-            print(f"No available locker of size {order.package.size.value} in location {location_id}")
-            return False
+        with self._lock_for(location_id):
+            locker = self.allocation_strategy.select(location, order.package.size)
+            if not locker:
+                self._reject(location_id, "no_locker",
+                             f"No available locker of size {order.package.size.value} in location {location_id}")
+                return False
 
-        try:
-            locker.assign_order(order)
-        except Exception as e:
-            print(e)
-            return False
+            try:
+                locker.assign_order(order)
+                order.otp = self._issue_otp(location, locker)
+            except Exception as e:
+                if locker.assigned_order is order:
+                    locker.release_order()
+                self._reject(location_id, "assign_failed", e)
+                return False
 
-        order.locker = locker
+            order.locker = locker
+            if self.journal:
+                self.journal.record_assign(order)
+        if order.pickup_deadline is not None:
+            self.expiry_scheduler.schedule(order)
+        return True
 
-        otp = self.notifier.generate_otp()
-        order.otp = otp
-        self.notifier.send_otp(order.customer.phone, otp, "Your locker OTP for package delivery.")
+    def _issue_otp(self, location: LockerLocation, locker: Locker) -> str:
+        """
+        Generates an OTP that no other locker in the location currently uses
+        and registers it in the location's OTP index.
+        """
+        for _ in range(self.OTP_ATTEMPTS):
+            otp = self.notifier.generate_otp()
+            if location.find_locker_by_otp(otp) is None:
+                location.register_otp(locker, otp)
+                return otp
+        raise Exception(f"Could not issue a unique OTP in location {location.location_id}")
+
+    def assign_locker_for_order(self, order: Order, location_id: str) -> bool:
+        if not self._reserve_locker(order, location_id):
+            return False
+        self.notifier.send_otp(order.customer.phone, order.otp, "Your locker OTP for package delivery.")
+        order.otp = None  # only the location's hash is kept once the code is sent
         return True
 
-    def process_return(self, order: Order, location_id: str) -> bool:
+    def assign_lockers_bulk(self, orders: list, location_id: str) -> list:
+        """
+        Assigns lockers for many orders at one location. Orders are grouped by
+        package size and served from the location's free pools in one pass;
+        all OTPs go to the notifier in a single send_otp_batch call.
+        Returns one bool per order, in the same order as `orders`.
+        """
+        results = [False] * len(orders)
         location = self.find_locker_location(location_id)
         if not location:
-            print(f"Location {location_id} not found")
-            return False
+            self._reject(location_id, "location_not_found", f"Location {location_id} not found")
+            return results
 
-        locker = location.find_available_locker(order.package.size)
-        if not locker:
-            print(f"No available locker of size {order.package.size.value} in location {location_id}")
-            return False
+        orders_by_size = defaultdict(list)
+        for index, order in enumerate(orders):
+            orders_by_size[order.package.size].append(index)
 
-        try:
-            locker.assign_order(order)
-        except Exception as e:
-            print(e)
-            return False
+        messages = []
+        with self._lock_for(location_id):
+            for size, indices in orders_by_size.items():
+                for served, index in enumerate(indices):
+                    locker = self.allocation_strategy.select(location, size)
+                    if not locker:
+                        message = (f"No available locker of size {size.value} in location {location_id} "
+                                   f"for {len(indices) - served} orders")
+                        self._reject(location_id, "no_locker", message, len(indices) - served)
+                        break
+                    order = orders[index]
+                    locker.assign_order(order)
+                    try:
+                        order.otp = self._issue_otp(location, locker)
+                    except Exception as e:
+                        locker.release_order()
+                        self._reject(location_id, "assign_failed", e)
+                        continue
+                    order.locker = locker
+                    if self.journal:
+                        self.journal.record_assign(order)
+                    messages.append((order.customer.phone, order.otp, "Your locker OTP for package delivery."))
+                    order.otp = None
+                    results[index] = True
+                    if order.pickup_deadline is not None:
+                        self.expiry_scheduler.schedule(order)
 
-        order.locker = locker
+        if messages:
+            self.notifier.send_otp_batch(messages)
+        return results
 
-        otp = self.notifier.generate_otp()
-        order.otp = otp
-        self.notifier.send_otp(order.customer.phone, otp, "Your locker OTP for package return.")
+    def process_return(self, order: Order, location_id: str) -> bool:
+        if not self._reserve_locker(order, location_id):
+            return False
+        self.notifier.send_otp(order.customer.phone, order.otp, "Your locker OTP for package return.")
+        order.otp = None
         return True
 
+    def expire_overdue_orders(self, now: datetime = None, return_to_sender=None) -> list:
+        """
+        Releases the lockers of orders whose pickup deadline has passed and
+        returns those orders. `return_to_sender`, if given, is called with
+        each expired order once its locker has been released.
+        """
+        now = now or datetime.now()
+        expired = []
+        for order in self.expiry_scheduler.pop_expired(now):
+            locker = order.locker
+            if locker is None:  # picked up since it was popped
+                continue
+            location_id = locker.location.location_id if locker.location else locker.locker_id
+            with self._lock_for(location_id):
+                if order.locker is not locker or locker.assigned_order is not order \
+                        or locker.state != LockerState.CLOSED:
+                    continue
+                locker.release_order()
+                if self.journal:
+                    self.journal.record(LockerJournal.locker_event("release", locker))
+                order.locker = None
+                order.otp = None
+            expired.append(order)
+            if return_to_sender:
+                return_to_sender(order)
+        return expired
+
     def pickup_order(self, order: Order, otp: str):
         """
         Process order pickup. The caller must provide the OTP received by the customer.
         """
         locker = order.locker
         if not locker:
-            print("Order has no locker assigned")
+            self._reject(None, "no_locker_assigned", "Order has no locker assigned")
             return
 
+        location_id = locker.location.location_id if locker.location else locker.locker_id
+        with self._lock_for(location_id):
+            self._open_and_close(locker, otp, location_id)
+
+    def pickup_by_code(self, location_id: str, otp: str) -> Order:
+        """
+        Kiosk pickup: resolves a typed OTP to its locker through the location's
+        OTP index and returns the picked-up order, or None if the code is unknown.
+        """
+        location = self.find_locker_location(location_id)
+        if not location:
+            self._reject(location_id, "location_not_found", f"Location {location_id} not found")
+            return None
+
+        with self._lock_for(location_id):
+            locker = location.find_locker_by_otp(otp)
+            if not locker:
+                self._reject(location_id, "invalid_otp", "Invalid OTP provided. No locker matches this code.")
+                return None
+            order = locker.assigned_order
+            return order if self._open_and_close(locker, otp, location_id) else None
+
+    def _open_and_close(self, locker: Locker, otp: str, location_id: str) -> bool:
         try:
             locker.open_with_code(otp)  # Validate the OTP and open the locker
+            if self.journal:
+                self.journal.record(LockerJournal.locker_event("open", locker))
             # Simulate the pickup process here...
             locker.close()  # After pickup, the locker is closed and becomes available again.
+            if self.journal:
+                self.journal.record(LockerJournal.locker_event("close", locker))
+            return True
         except Exception as e:
-            print(e)
+            self._reject(location_id, "pickup_failed", e)
+            return False
 
 # -------------------------------
 # Example Usage
 # -------------------------------
 if __name__ == "__main__":
-    # Create the OTP service
-    notifier = OTPService()
+    # Create the OTP service; it keeps the last code sent, standing in for the customer's phone
+    class DemoOTPService(OTPService):
+        def send_otp(self, phone: str, otp: str, message: str):
+            super().send_otp(phone, otp, message)
+            self.last_sent = otp
+
+    notifier = DemoOTPService()
 
     # Get the singleton instance of AmazonLockerService
     locker_service = AmazonLockerService(notifier)
@@ -249,4 +1345,4 @@ if __name__ == "__main__":
 
     # Simulate the pickup process (OTP must match the one sent)
     print("Customer attempting to pick up order with OTP:")
-    locker_service.pickup_order(order, "123456")
+    locker_service.pickup_order(order, notifier.last_sent)
@@ -0,0 +1,76 @@
+"""
+Simulates a day of arrivals and pickups at one location for each allocation
+strategy and reports utilization, rejection rate (overall and per package
+size) and allocation throughput.
+
+Arrivals are skewed towards MEDIUM parcels while the site has equal numbers
+of each locker size, which is where exact-fit rejects parcels that would
+fit in a free LARGE locker.
+
+run: python benchmarks/bench_allocation_strategies.py
+"""
+import heapq
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from amazon_locker_service import (
+    BestFitUpgradeStrategy, Customer, ExactFitStrategy, Locker, LockerLocation,
+    LockerSize, Order, Package, ReserveAwareStrategy,
+)
+
+LOCKERS_PER_SIZE = 1_000
+ARRIVALS = 200_000
+MIX = {LockerSize.SMALL: 0.3, LockerSize.MEDIUM: 0.5, LockerSize.LARGE: 0.2}
+MEAN_DWELL = 3 * LOCKERS_PER_SIZE  # in arrivals; keeps the site close to full
+
+
+def simulate(strategy, seed: int = 11):
+    rng = random.Random(seed)
+    location = LockerLocation("SIM", "1 Sim Road")
+    for size in LockerSize:
+        for i in range(LOCKERS_PER_SIZE):
+            location.add_locker(Locker(f"{size.name}-{i}", size))
+    capacity = LOCKERS_PER_SIZE * len(LockerSize)
+    customer = Customer("sim", "555-0000")
+    sizes, weights = list(MIX), list(MIX.values())
+
+    pickups = []  # (time, seq, locker)
+    rejected = {size: 0 for size in LockerSize}
+    arrived = {size: 0 for size in LockerSize}
+    occupied_sum = 0
+    start = time.perf_counter()
+    for now in range(ARRIVALS):
+        while pickups and pickups[0][0] <= now:
+            heapq.heappop(pickups)[2].release_order()
+        size = rng.choices(sizes, weights)[0]
+        arrived[size] += 1
+        locker = strategy.select(location, size)
+        if locker is None:
+            rejected[size] += 1
+        else:
+            locker.assign_order(Order(f"O{now}", customer, Package(f"P{now}", size)))
+            heapq.heappush(pickups, (now + rng.expovariate(1 / MEAN_DWELL), now, locker))
+        occupied_sum += capacity - sum(location.free_count(s) for s in LockerSize)
+    elapsed = time.perf_counter() - start
+    utilization = occupied_sum / (ARRIVALS * capacity)
+    return utilization, rejected, arrived, ARRIVALS / elapsed
+
+
+if __name__ == "__main__":
+    strategies = {
+        "exact": ExactFitStrategy(),
+        "best-fit": BestFitUpgradeStrategy(),
+        "reserve 20%": ReserveAwareStrategy(0.2),
+    }
+    header = f"{'policy':>12} {'util':>7} {'reject':>7}"
+    header += "".join(f" {size.name.lower() + ' rej':>10}" for size in LockerSize)
+    print(header + f" {'events/s':>10}")
+    for name, strategy in strategies.items():
+        utilization, rejected, arrived, rate = simulate(strategy)
+        line = f"{name:>12} {utilization:>7.1%} {sum(rejected.values()) / ARRIVALS:>7.1%}"
+        line += "".join(f" {rejected[size] / arrived[size]:>10.1%}" for size in LockerSize)
+        print(line + f" {rate:>10.0f}")
@@ -0,0 +1,115 @@
+"""
+Shows that locker assignment latency stops tracking SMS gateway latency once
+OTPs go through AsyncOTPService, as long as its queue has room.
+
+For each gateway latency the same FakeSMSGateway is driven by
+  * sync  - an OTPService whose send_otp waits for the gateway inline
+  * async - AsyncOTPService (queue + pooled connections), with a queue
+            big enough for the whole burst
+and the p50/p99 of assign_locker_for_order is reported.
+
+The sustained part sends orders at a fixed arrival rate against a queue of
+MAX_QUEUE, below and above what the gateway can take (concurrency / latency
+sends per second). Latency there is counted from each order's scheduled
+arrival. Above gateway capacity the queue fills up, send_otp blocks, and
+assignment falls back to gateway speed: the p99 grows with the backlog,
+whatever the queue size.
+
+run: python benchmarks/bench_async_notifier.py
+"""
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from amazon_locker_service import (
+    AmazonLockerService, AsyncOTPService, Customer, FakeSMSGateway, Locker,
+    LockerLocation, LockerSize, OTPService, Order, Package,
+)
+
+LATENCIES = [0.0, 0.01, 0.05]
+SYNC_ORDERS = 50
+ASYNC_ORDERS = 2_000
+CONCURRENCY = 32
+SUSTAINED_LATENCY = 0.05
+SUSTAINED_ORDERS = 1_500
+LOADS = [0.5, 2.0]  # arrival rate as a multiple of gateway capacity
+MAX_QUEUE = 256
+
+
+class BlockingGatewayOTPService(OTPService):
+    def __init__(self, transport: FakeSMSGateway):
+        super().__init__()
+        self.transport = transport
+        self.loop = asyncio.new_event_loop()
+        self.connection = self.loop.run_until_complete(transport.connect())
+
+    def send_otp(self, phone: str, otp: str, message: str):
+        self.loop.run_until_complete(self.transport.send(self.connection, phone, f"{message} OTP: {otp}"))
+
+
+def percentile(samples, p):
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(len(samples) * p))]
+
+
+def orders(service: AmazonLockerService, location_id: str, count: int):
+    location = LockerLocation(location_id, "1 Bench Road")
+    for i in range(count):
+        location.add_locker(Locker(f"{location_id}-L{i}", LockerSize.SMALL))
+    service.add_locker_location(location)
+    customer = Customer("bench", "555-0000")
+    return [Order(f"{location_id}-O{i}", customer, Package(f"P{i}", LockerSize.SMALL)) for i in range(count)]
+
+
+def measure(service: AmazonLockerService, location_id: str, count: int):
+    samples = []
+    for order in orders(service, location_id, count):
+        start = time.perf_counter()
+        service.assign_locker_for_order(order, location_id)
+        samples.append(time.perf_counter() - start)
+    return percentile(samples, 0.5) * 1e3, percentile(samples, 0.99) * 1e3
+
+
+# open loop: order i arrives at i / rate whether or not earlier ones are done
+def measure_sustained(service: AmazonLockerService, location_id: str, count: int, rate: float):
+    samples = []
+    begin = time.perf_counter()
+    for i, order in enumerate(orders(service, location_id, count)):
+        arrival = begin + i / rate
+        wait = arrival - time.perf_counter()
+        if wait > 0:
+            time.sleep(wait)
+        service.assign_locker_for_order(order, location_id)
+        samples.append(time.perf_counter() - arrival)
+    return percentile(samples, 0.5) * 1e3, percentile(samples, 0.99) * 1e3
+
+
+if __name__ == "__main__":
+    service = AmazonLockerService(OTPService())
+    print(f"{'gateway ms':>10} {'mode':>6} {'p50 ms':>10} {'p99 ms':>10}")
+    for latency in LATENCIES:
+        service.notifier = BlockingGatewayOTPService(FakeSMSGateway(latency))
+        p50, p99 = measure(service, f"SYNC{latency}", SYNC_ORDERS)
+        print(f"{latency * 1e3:>10.0f} {'sync':>6} {p50:>10.3f} {p99:>10.3f}")
+
+        notifier = AsyncOTPService(FakeSMSGateway(latency), concurrency=CONCURRENCY, max_queue=ASYNC_ORDERS)
+        service.notifier = notifier
+        p50, p99 = measure(service, f"ASYNC{latency}", ASYNC_ORDERS)
+        notifier.close()
+        assert notifier.delivered == ASYNC_ORDERS
+        print(f"{latency * 1e3:>10.0f} {'async':>6} {p50:>10.3f} {p99:>10.3f}")
+
+    capacity = CONCURRENCY / SUSTAINED_LATENCY
+    print(f"\nsustained load, gateway {SUSTAINED_LATENCY * 1e3:.0f} ms, {CONCURRENCY} connections "
+          f"({capacity:.0f} sends/s), max_queue {MAX_QUEUE}")
+    print(f"{'load':>10} {'orders/s':>9} {'p50 ms':>10} {'p99 ms':>10}")
+    for load in LOADS:
+        notifier = AsyncOTPService(FakeSMSGateway(SUSTAINED_LATENCY), concurrency=CONCURRENCY, max_queue=MAX_QUEUE)
+        service.notifier = notifier
+        p50, p99 = measure_sustained(service, f"LOAD{load}", SUSTAINED_ORDERS, capacity * load)
+        notifier.close()
+        assert notifier.delivered == SUSTAINED_ORDERS
+        print(f"{load:>9.1f}x {capacity * load:>9.0f} {p50:>10.3f} {p99:>10.3f}")
@@ -0,0 +1,77 @@
+"""
+Hands per second for scoring random 5 card hands with
+  * game        - Game.evaluate_hand, one Hand at a time
+  * batch       - BatchEvaluator on Hand objects, including HandBatch.from_hands
+  * batch bytes - BatchEvaluator on hands already encoded as value/suit bytes,
+                  as a simulation job would generate them
+Batch ranks are checked against per hand card counts.
+
+run: python benchmarks/bench_batch_evaluator.py
+"""
+import os
+import random
+import sys
+import time
+from collections import Counter
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from poker import NO_RANK, BatchEvaluator, Card, Flush, Game, Hand, HandBatch, Pair, ThreeOfAKind
+
+GAME_HANDS = 50_000
+BATCH_HANDS = 1_000_000
+SYMBOLS = "ABCD"
+
+
+def rules():
+    return {Flush(): 1, ThreeOfAKind(): 2, Pair(): 3}
+
+
+def random_hands(n: int, rng: random.Random):
+    hands = []
+    for _ in range(n):
+        hand = Hand()
+        for _ in range(5):
+            hand.add_card(Card(rng.randint(1, 10), rng.choice(SYMBOLS)))
+        hands.append(hand)
+    return hands
+
+
+def expected_rank(hand: Hand) -> int:
+    cards = [hand.get_card(i) for i in range(hand.size)]
+    counts = max(Counter(card.get_value() for card in cards).values())
+    if len({card.get_symbol() for card in cards}) == 1:
+        return 1
+    return 2 if counts >= 3 else 3 if counts >= 2 else NO_RANK
+
+
+def per_second(n: int, func) -> float:
+    start = time.perf_counter()
+    func()
+    return n / (time.perf_counter() - start)
+
+
+if __name__ == "__main__":
+    rng = random.Random(1)
+    evaluator = BatchEvaluator(rules())
+
+    hands = random_hands(GAME_HANDS, rng)
+    ranks = evaluator.evaluate(HandBatch.from_hands(hands))
+    assert list(ranks) == [expected_rank(hand) for hand in hands]
+
+    def run_game():
+        for hand in hands:
+            game = Game(hand)
+            game.set_rules(rules())
+            game.evaluate_hand()
+
+    game_rate = per_second(GAME_HANDS, run_game)
+    batch_rate = per_second(GAME_HANDS, lambda: evaluator.evaluate(HandBatch.from_hands(hands)))
+
+    values = bytes(rng.randint(1, 10) for _ in range(5 * BATCH_HANDS))
+    suits = bytes(rng.randrange(len(SYMBOLS)) for _ in range(5 * BATCH_HANDS))
+    bytes_rate = per_second(BATCH_HANDS, lambda: evaluator.evaluate(HandBatch(values, suits)))
+
+    print(f"{'path':>12} {'hands/s':>12} {'speedup':>8}")
+    for name, rate in (("game", game_rate), ("batch", batch_rate), ("batch bytes", bytes_rate)):
+        print(f"{name:>12} {rate:>12,.0f} {rate / game_rate:>7.1f}x")
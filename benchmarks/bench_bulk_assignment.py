@@ -0,0 +1,57 @@
+"""
+Compares AmazonLockerService.assign_lockers_bulk against calling
+assign_locker_for_order once per order, for 100k orders of mixed sizes.
+
+The notifier sends nothing and counts gateway round trips, so the numbers
+show the cost of the service itself plus how many calls would hit the SMS
+gateway.
+
+run: python benchmarks/bench_bulk_assignment.py
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from amazon_locker_service import (
+    AmazonLockerService, Customer, Locker, LockerLocation,
+    LockerSize, Order, Package,
+)
+from notifiers import CapturingNotifier
+
+ORDERS = 100_000
+
+
+def build(service: AmazonLockerService, location_id: str):
+    sizes = list(LockerSize)
+    location = LockerLocation(location_id, "1 Bench Road")
+    for i in range(ORDERS):
+        location.add_locker(Locker(f"{location_id}-L{i}", sizes[i % len(sizes)]))
+    service.add_locker_location(location)
+    customer = Customer("bench", "555-0000")
+    return [Order(f"{location_id}-O{i}", customer, Package(f"P{i}", sizes[i % len(sizes)]))
+            for i in range(ORDERS)]
+
+
+if __name__ == "__main__":
+    service = AmazonLockerService(CapturingNotifier())
+
+    service.notifier = CapturingNotifier()
+    orders = build(service, "LOOP")
+    start = time.perf_counter()
+    for order in orders:
+        service.assign_locker_for_order(order, "LOOP")
+    loop_time = time.perf_counter() - start
+    loop_calls = service.notifier.gateway_calls
+
+    service.notifier = CapturingNotifier()
+    orders = build(service, "BULK")
+    start = time.perf_counter()
+    results = service.assign_lockers_bulk(orders, "BULK")
+    bulk_time = time.perf_counter() - start
+    assert all(results)
+
+    print(f"{'mode':>6} {'orders/s':>12} {'gateway calls':>14}")
+    print(f"{'loop':>6} {ORDERS / loop_time:>12.0f} {loop_calls:>14}")
+    print(f"{'bulk':>6} {ORDERS / bulk_time:>12.0f} {service.notifier.gateway_calls:>14}")
@@ -0,0 +1,71 @@
+"""
+Per-node evaluation cost of interpreted criteria trees (nested AndCriteria /
+OrCriteria over a DefaultCriteria root, as BuildCriteria produces them)
+against CompiledCriteria, plus a full Find over a 1M node tree.
+
+run: python benchmarks/bench_criteria_compiler.py
+"""
+import importlib.util
+import os
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+spec = importlib.util.spec_from_file_location("linux_find_api", os.path.join(ROOT, "linux-find-api.py"))
+find_api = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(find_api)
+
+NODES = 1_000_000
+
+
+class ExtensionCriteria(find_api.Icriteria):
+    def __init__(self, ext: str):
+        self.ext = ext
+
+    def apply(self, fileNode):
+        return fileNode.ext == self.ext
+
+
+def queries():
+    F = find_api
+    return {
+        "name and size": F.BuildCriteria().and_op(F.FileNameCriteria("f7")).and_op(F.GreaterThanSizeCriteria(50)),
+        "size chain x4": (F.BuildCriteria().and_op(F.GreaterThanSizeCriteria(10)).and_op(F.GreaterThanSizeCriteria(20))
+                          .and_op(F.GreaterThanSizeCriteria(30)).and_op(F.GreaterThanSizeCriteria(40))),
+        "custom first": F.BuildCriteria().and_op(ExtensionCriteria("pdf")).and_op(F.GreaterThanSizeCriteria(80)),
+        "or of names": F.BuildCriteria().and_op(F.OrCriteria(F.FileNameCriteria("f1"),
+                                                             F.OrCriteria(F.FileNameCriteria("f2"),
+                                                                          F.FileNameCriteria("f3")))),
+    }
+
+
+def ns_per_node(predicate, nodes) -> float:
+    start = time.perf_counter()
+    for node in nodes:
+        predicate(node)
+    return (time.perf_counter() - start) / len(nodes) * 1e9
+
+
+if __name__ == "__main__":
+    files = [find_api.File(f"f{i % 10}", "pdf" if i % 3 else "xml", i % 100) for i in range(NODES)]
+    root = find_api.Directory("/")
+    for start in range(0, NODES, 1000):
+        directory = find_api.Directory(f"d{start}")
+        for node in files[start:start + 1000]:
+            directory.add_child(node)
+        root.add_child(directory)
+    finder = find_api.Find()
+
+    print(f"{'query':>14} {'tree ns':>8} {'compiled ns':>12} {'find tree s':>12} {'find comp s':>12}")
+    for name, builder in queries().items():
+        tree = builder.build()
+        compiled = builder.compile()
+        assert [compiled.apply(n) for n in files[:1000]] == [tree.apply(n) for n in files[:1000]]
+        tree_ns = ns_per_node(tree.apply, files)
+        compiled_ns = ns_per_node(compiled.apply, files)
+        start = time.perf_counter()
+        expected = finder.find_api(root, tree)
+        find_tree = time.perf_counter() - start
+        start = time.perf_counter()
+        assert finder.find_api(root, compiled) == expected
+        find_compiled = time.perf_counter() - start
+        print(f"{name:>14} {tree_ns:>8.0f} {compiled_ns:>12.0f} {find_tree:>12.2f} {find_compiled:>12.2f}")
@@ -0,0 +1,51 @@
+"""
+EquitySimulator scaling: trials/s for a pair of sixes against two random
+opponents, across trial counts and worker process counts. The estimate for
+a given seed is checked to be identical for every worker count, and the
+convergence of the last run is printed chunk by chunk.
+
+Workers default to 1, 2, 4 ... up to the machine's core count; pass a
+number to go beyond.
+
+run: python benchmarks/bench_equity_simulator.py [MAX_WORKERS]
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from poker import Card, EquitySimulator, Flush, Pair, ThreeOfAKind
+
+TRIALS = [20_000, 100_000, 400_000]
+CHUNK = 10_000
+
+
+def simulator():
+    rules = {Flush(): 1, ThreeOfAKind(): 2, Pair(): 3}
+    return EquitySimulator(rules, [Card(6, 'A'), Card(6, 'B')], opponents=2, seed=42)
+
+
+if __name__ == "__main__":
+    max_workers = int(sys.argv[1]) if len(sys.argv) > 1 else (os.cpu_count() or 1)
+    workers_list = []
+    workers = 1
+    while workers <= max_workers:
+        workers_list.append(workers)
+        workers *= 2
+    print(f"cores available: {os.cpu_count()}")
+    print(f"{'trials':>8} {'workers':>8} {'seconds':>8} {'trials/s':>10} {'estimate':>32}")
+    for trials in TRIALS:
+        reference = None
+        for workers in workers_list:
+            start = time.perf_counter()
+            estimate = simulator().simulate(trials, CHUNK, workers)
+            elapsed = time.perf_counter() - start
+            key = (estimate.wins, estimate.ties, estimate.equity)
+            assert reference is None or key == reference, "result depends on worker count"
+            reference = key
+            print(f"{trials:>8} {workers:>8} {elapsed:>8.2f} {trials / elapsed:>10,.0f} {estimate!r:>32}")
+
+    print("\nconvergence:")
+    for estimate in simulator().simulate_iter(TRIALS[-1], 4 * CHUNK, workers_list[-1]):
+        print(f"  {estimate!r}")
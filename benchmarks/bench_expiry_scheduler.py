@@ -0,0 +1,74 @@
+"""
+Expiry engine at scale: N orders with pickup deadlines spread over three days
+are assigned, a tenth of them are picked up, and the clock then ticks once
+a simulated minute through AmazonLockerService.expire_overdue_orders.
+
+Reports scheduling cost, total tick time and cost per expired order.
+
+run: python benchmarks/bench_expiry_scheduler.py
+"""
+import contextlib
+import io
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from amazon_locker_service import (
+    AmazonLockerService, Customer, Locker, LockerLocation,
+    LockerSize, Order, Package,
+)
+from notifiers import CapturingNotifier
+
+SIZES = [100_000, 1_000_000, 2_000_000]
+HORIZON = timedelta(days=3)
+TICK = timedelta(minutes=1)
+
+
+if __name__ == "__main__":
+    service = AmazonLockerService(CapturingNotifier())
+    service.notifier = CapturingNotifier()
+    rng = random.Random(3)
+    start_time = datetime(2026, 1, 1)
+    horizon = HORIZON.total_seconds()
+    customer = Customer("bench", "555-0000")
+    print(f"{'pending':>10} {'schedule s':>11} {'ticks':>6} {'tick s':>8} {'expired':>9} {'us/expiry':>10}")
+    for n in SIZES:
+        location_id = f"EXP{n}"
+        location = LockerLocation(location_id, "1 Bench Road")
+        for i in range(n):
+            location.add_locker(Locker(f"{location_id}-L{i}", LockerSize.SMALL))
+        service.add_locker_location(location)
+        orders = []
+        for i in range(n):
+            order = Order(f"{location_id}-O{i}", customer, Package(f"P{i}", LockerSize.SMALL))
+            order.pickup_deadline = start_time + timedelta(seconds=rng.uniform(0, horizon))
+            orders.append(order)
+
+        service.notifier.sent.clear()
+        begin = time.perf_counter()
+        for order in orders:
+            service.assign_locker_for_order(order, location_id)
+        schedule_time = time.perf_counter() - begin
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            for order, otp in list(zip(orders, service.notifier.sent))[::10]:
+                service.pickup_order(order, otp)
+
+        now, ticks, expired = start_time, 0, 0
+        begin = time.perf_counter()
+        while now <= start_time + HORIZON:
+            now += TICK
+            ticks += 1
+            expired += len(service.expire_overdue_orders(now))
+        tick_time = time.perf_counter() - begin
+
+        assert expired == n - len(orders[::10])
+        assert len(location.free_lockers[LockerSize.SMALL]) == n
+        print(f"{n:>10} {schedule_time:>11.2f} {ticks:>6} {tick_time:>8.2f} {expired:>9} "
+              f"{tick_time / expired * 1e6:>10.2f}")
+        del location, orders
+        service.locker_locations.pop(location_id)
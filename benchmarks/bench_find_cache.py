@@ -0,0 +1,84 @@
+"""
+Find with and without a FindCache on a 1M file tree (100 x 100 directories
+of 100 files), for
+  * repeated - the same queries over and over on a static tree
+  * mutated  - one file added or removed in a random leaf directory
+               before every query, so only the directories on its path
+               are recomputed
+The cached results are checked against an uncached Find every time.
+
+run: python benchmarks/bench_find_cache.py
+"""
+import importlib.util
+import os
+import random
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+spec = importlib.util.spec_from_file_location("linux_find_api", os.path.join(ROOT, "linux-find-api.py"))
+find_api = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(find_api)
+
+FANOUT = 100
+QUERIES = 30
+
+
+def build():
+    root = find_api.Directory("/")
+    leaves = []
+    for i in range(FANOUT):
+        top = find_api.Directory(f"top{i}")
+        root.add_child(top)
+        for j in range(FANOUT):
+            leaf = find_api.Directory(f"sub{j}")
+            top.add_child(leaf)
+            leaves.append(leaf)
+            for k in range(FANOUT):
+                leaf.add_child(find_api.File(f"f{k}", "pdf" if k % 2 else "xml", (i * j * k) % 1000))
+    return root, leaves
+
+
+def queries():
+    F = find_api
+    return [
+        F.BuildCriteria().and_op(F.ExtensionCriteria("pdf")).and_op(F.GreaterThanSizeCriteria(990)).build(),
+        F.BuildCriteria().and_op(F.FileNameCriteria("f7")).build(),
+        # same query as the first one, written the other way round: same fingerprint
+        F.BuildCriteria().and_op(F.GreaterThanSizeCriteria(990)).and_op(F.ExtensionCriteria("pdf")).build(),
+    ]
+
+
+def run(finder, root, leaves, mutate: bool, check):
+    rng = random.Random(5)
+    added = []
+    elapsed = 0.0
+    for i in range(QUERIES):
+        if mutate:
+            if added and rng.random() < 0.5:
+                file = added.pop(rng.randrange(len(added)))
+                file.parent.remove_child(file)
+            else:
+                file = find_api.File(f"new{i}", "pdf", 995)
+                rng.choice(leaves).add_child(file)
+                added.append(file)
+        criteria = queries()[i % 3]
+        start = time.perf_counter()
+        result = finder.find_api(root, criteria)
+        elapsed += time.perf_counter() - start
+        if check:
+            assert result == find_api.Find().find_api(root, criteria)
+    return elapsed / QUERIES * 1e3
+
+
+if __name__ == "__main__":
+    root, leaves = build()
+    print(f"{'workload':>9} {'uncached ms':>12} {'cached ms':>10} {'hits':>7} {'misses':>7} {'hit rate':>9}")
+    for mutate in (False, True):
+        uncached = run(find_api.Find(), root, leaves, mutate, check=False)
+        cache = find_api.FindCache(capacity=20_000)
+        finder = find_api.Find(cache)
+        run(finder, root, leaves, mutate, check=True)  # correctness pass, also warms the cache
+        cache.hits = cache.misses = 0
+        cached = run(finder, root, leaves, mutate, check=False)
+        label = "mutated" if mutate else "repeated"
+        print(f"{label:>9} {uncached:>12.1f} {cached:>10.2f} {cache.hits:>7} {cache.misses:>7} {cache.hit_rate:>9.1%}")
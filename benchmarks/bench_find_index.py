@@ -0,0 +1,77 @@
+"""
+Find over a 1M file tree with and without the secondary indexes built by
+Directory.build_index, for queries the indexes can answer (exact name,
+extension, size range and their combinations) and one they cannot.
+Also reports index build time and the cost of add_child/remove_child
+while the tree is indexed.
+
+run: python benchmarks/bench_find_index.py
+"""
+import importlib.util
+import os
+import random
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+spec = importlib.util.spec_from_file_location("linux_find_api", os.path.join(ROOT, "linux-find-api.py"))
+find_api = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(find_api)
+
+FILES = 1_000_000
+PER_DIR = 1_000
+EXTS = ["pdf", "xml", "txt", "py", "jpg", "csv", "log", "md"]
+
+
+class EvenSizeCriteria(find_api.Icriteria):
+    def apply(self, fileNode):
+        return fileNode.size % 2 == 0
+
+
+def build(rng: random.Random):
+    root = find_api.Directory("/")
+    for start in range(0, FILES, PER_DIR):
+        directory = find_api.Directory(f"d{start}")
+        for i in range(start, start + PER_DIR):
+            directory.add_child(find_api.File(f"file{i}", rng.choice(EXTS), rng.randrange(1_000_000)))
+        root.add_child(directory)
+    return root
+
+
+def timed(func):
+    start = time.perf_counter()
+    result = func()
+    return time.perf_counter() - start, result
+
+
+if __name__ == "__main__":
+    F = find_api
+    rng = random.Random(9)
+    scan_root = build(rng)
+    rng = random.Random(9)
+    indexed_root = build(rng)
+    build_time, index = timed(indexed_root.build_index)
+    finder = F.Find()
+    queries = {
+        "exact name": F.BuildCriteria().and_op(F.FileNameCriteria("file424242")),
+        "size >= 999k": F.BuildCriteria().and_op(F.GreaterThanSizeCriteria(999_000)),
+        "ext and size": F.BuildCriteria().and_op(F.ExtensionCriteria("csv")).and_op(F.GreaterThanSizeCriteria(990_000)),
+        "name or name": F.BuildCriteria().and_op(F.OrCriteria(F.FileNameCriteria("file1"), F.FileNameCriteria("file2"))),
+        "ext (1/8)": F.BuildCriteria().and_op(F.ExtensionCriteria("md")),
+        "custom (scan)": F.BuildCriteria().and_op(EvenSizeCriteria()),
+    }
+    print(f"index build: {build_time:.2f}s for {len(index)} files\n")
+    print(f"{'query':>14} {'matches':>8} {'scan ms':>9} {'index ms':>9} {'speedup':>8}")
+    for name, builder in queries.items():
+        criteria = builder.compile()
+        scan_time, expected = timed(lambda: finder.find_api(scan_root, criteria))
+        index_time, result = timed(lambda: finder.find_api(indexed_root, criteria))
+        assert [n.name for n in result] == [n.name for n in expected]
+        print(f"{name:>14} {len(result):>8} {scan_time * 1e3:>9.1f} {index_time * 1e3:>9.2f} "
+              f"{scan_time / index_time:>7.0f}x")
+
+    directory = next(iter(indexed_root.children))
+    files = [F.File(f"new{i}", "pdf", rng.randrange(1_000_000)) for i in range(10_000)]
+    add_time, _ = timed(lambda: [directory.add_child(f) for f in files])
+    remove_time, _ = timed(lambda: [directory.remove_child(f) for f in files])
+    print(f"\nindexed add_child: {add_time / len(files) * 1e6:.1f} us, "
+          f"remove_child: {remove_time / len(files) * 1e6:.1f} us")
@@ -0,0 +1,72 @@
+"""
+Scaling of Find.find_parallel from 1 to N worker processes on a tree of
+top-level subtrees with an expensive criterion, checked against the
+sequential find_api result order.
+
+N defaults to the machine's core count; pass it explicitly to go beyond.
+
+run: python benchmarks/bench_find_parallel.py [N]
+"""
+import importlib.util
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+spec = importlib.util.spec_from_file_location("linux_find_api", os.path.join(ROOT, "linux-find-api.py"))
+find_api = importlib.util.module_from_spec(spec)
+sys.modules["linux_find_api"] = find_api  # workers look the task function up by module name
+spec.loader.exec_module(find_api)
+
+SUBTREES = 64
+FILES_PER_SUBTREE = 5_000
+
+
+class SlowExtensionCriteria(find_api.Icriteria):
+    """
+    Stands in for a CPU-bound criterion such as a content or regex match.
+    """
+    def __init__(self, ext: str, rounds: int = 20):
+        self.ext = ext
+        self.rounds = rounds
+
+    def apply(self, fileNode):
+        digest = 0
+        for char in fileNode.get_name() * self.rounds:
+            digest = (digest * 31 + ord(char)) & 0xFFFF
+        return getattr(fileNode, "ext", None) == self.ext and digest % 3 == 0
+
+
+def build():
+    root = find_api.Directory("/")
+    for i in range(SUBTREES):
+        top = find_api.Directory(f"top{i}")
+        for j in range(FILES_PER_SUBTREE // 100):
+            sub = find_api.Directory(f"sub{j}")
+            for k in range(100):
+                sub.add_child(find_api.File(f"f{i}-{j}-{k}", "pdf" if k % 2 else "xml", k))
+            top.add_child(sub)
+        root.add_child(top)
+    return root
+
+
+if __name__ == "__main__":
+    max_workers = int(sys.argv[1]) if len(sys.argv) > 1 else (os.cpu_count() or 1)
+    root = build()
+    criteria = SlowExtensionCriteria("pdf")
+    finder = find_api.Find()
+
+    start = time.perf_counter()
+    expected = finder.find_api(root, criteria)
+    sequential = time.perf_counter() - start
+    print(f"cores available: {os.cpu_count()}, nodes: {SUBTREES * FILES_PER_SUBTREE}")
+    print(f"{'workers':>8} {'seconds':>9} {'speedup':>8}")
+    print(f"{'seq':>8} {sequential:>9.2f} {1:>7.2f}x")
+    workers = 1
+    while workers <= max_workers:
+        start = time.perf_counter()
+        result = finder.find_parallel(root, criteria, workers)
+        elapsed = time.perf_counter() - start
+        assert [id(node) for node in result] == [id(node) for node in expected]
+        print(f"{workers:>8} {elapsed:>9.2f} {sequential / elapsed:>7.2f}x")
+        workers *= 2
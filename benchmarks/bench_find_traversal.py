@@ -0,0 +1,86 @@
+"""
+Iterative Find.find_iter against the old recursive find_helper on
+  * wide trees with millions of nodes (full scan, and first-match with limit=1)
+  * a single chain deeper than the recursion limit
+
+run: python benchmarks/bench_find_traversal.py
+"""
+import importlib.util
+import os
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+spec = importlib.util.spec_from_file_location("linux_find_api", os.path.join(ROOT, "linux-find-api.py"))
+find_api = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(find_api)
+
+WIDE = [100_000, 1_000_000, 3_000_000]
+FANOUT = 10
+DEPTH = 50_000
+
+
+def recursive_find(root, criteria):
+    result = []
+
+    def helper(node):
+        if node.ftype == find_api.Ftype.FILE:
+            if criteria.apply(node):
+                result.append(node)
+            return
+        for child in node.children:
+            helper(child)
+
+    helper(root)
+    return result
+
+
+def build_wide(n: int):
+    root = find_api.Directory("/")
+    dirs = [root]
+    for i in range(n // (FANOUT + 1)):
+        directory = find_api.Directory(f"d{i}")
+        dirs[i // FANOUT].add_child(directory)
+        dirs.append(directory)
+        for j in range(FANOUT):
+            directory.add_child(find_api.File(f"f{i}-{j}", "pdf" if j % 2 else "xml", j * 10))
+    return root
+
+
+def build_deep(depth: int):
+    root = directory = find_api.Directory("/")
+    for i in range(depth):
+        child = find_api.Directory(f"d{i}")
+        directory.add_child(child)
+        directory = child
+    directory.add_child(find_api.File("bottom", "txt", 1))
+    return root
+
+
+def timed(func):
+    start = time.perf_counter()
+    result = func()
+    return time.perf_counter() - start, result
+
+
+if __name__ == "__main__":
+    finder = find_api.Find()
+    criteria = find_api.BuildCriteria().and_op(find_api.GreaterThanSizeCriteria(50)).build()
+    print(f"{'nodes':>10} {'recursive s':>12} {'iterative s':>12} {'limit=1 ms':>11} {'matches':>9}")
+    for n in WIDE:
+        root = build_wide(n)
+        recursive_time, expected = timed(lambda: recursive_find(root, criteria))
+        iterative_time, result = timed(lambda: finder.find_api(root, criteria))
+        first_time, _ = timed(lambda: finder.find_api(root, criteria, limit=1))
+        assert result == expected
+        print(f"{n:>10} {recursive_time:>12.2f} {iterative_time:>12.2f} {first_time * 1e3:>11.3f} {len(result):>9}")
+        del root, expected, result
+
+    root = build_deep(DEPTH)
+    any_file = find_api.BuildCriteria().build()
+    try:
+        recursive_find(root, any_file)
+        recursive = "ok"
+    except RecursionError:
+        recursive = "RecursionError"
+    deep_time, result = timed(lambda: finder.find_api(root, any_file))
+    print(f"\ndepth {DEPTH}: recursive -> {recursive}, iterative -> {len(result)} match in {deep_time:.3f}s")
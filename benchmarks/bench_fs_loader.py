@@ -0,0 +1,106 @@
+"""
+Loading a real directory tree into the Find model:
+  * walk+stat - os.walk, then os.stat per file, nodes added with add_child
+  * scandir   - load_tree(), forcing every LazyDirectory to load
+  * lazy      - load_tree() and a Find limited to one top-level directory,
+                so only that part of the tree is ever read
+
+The tree is generated in a temp directory (NODES files in FANOUT-wide
+directories, plus some symlinks). Pass a path to load an existing tree
+instead; the page cache is warm for both loaders after the first pass.
+
+run: python benchmarks/bench_fs_loader.py [NODES | PATH]
+"""
+import importlib.util
+import os
+import shutil
+import sys
+import tempfile
+import time
+from stat import S_ISLNK
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+spec = importlib.util.spec_from_file_location("linux_find_api", os.path.join(ROOT, "linux-find-api.py"))
+find_api = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(find_api)
+
+NODES = 100_000
+FANOUT = 100
+
+
+def generate(path: str, nodes: int):
+    for d in range(nodes // FANOUT):
+        directory = os.path.join(path, f"top{d % 10}", f"d{d}")
+        os.makedirs(directory)
+        for f in range(FANOUT):
+            with open(os.path.join(directory, f"f{f}.{'pdf' if f % 2 else 'xml'}"), "wb") as out:
+                out.write(b"x" * (f % 7))
+        os.symlink(os.path.join(directory, "f0.xml"), os.path.join(directory, "link"))
+
+
+def walk_and_stat(path: str):
+    dirs = {}
+    for dirpath, dirnames, filenames in os.walk(path):
+        directory = dirs.pop(dirpath, None) or find_api.Directory(os.path.basename(dirpath))
+        for name in dirnames:
+            child = find_api.Directory(name)
+            directory.add_child(child)
+            dirs[os.path.join(dirpath, name)] = child
+        for name in filenames:
+            file_path = os.path.join(dirpath, name)
+            stat = os.stat(file_path, follow_symlinks=False)
+            if S_ISLNK(stat.st_mode):
+                directory.add_child(find_api.Symlink(name, os.readlink(file_path), stat.st_size, stat.st_mtime))
+            else:
+                directory.add_child(find_api.File(name, os.path.splitext(name)[1][1:], stat.st_size, stat.st_mtime))
+        if dirpath == path:
+            root = directory
+    return root
+
+
+def load_all(path: str):
+    root = find_api.load_tree(path)
+    stack = [root]
+    while stack:
+        stack.extend(child for child in stack.pop().children if child.ftype == find_api.Ftype.DIRECTORY)
+    return root
+
+
+def count_files(root) -> int:
+    return len(find_api.Find().find_api(root, find_api.DefaultCriteria()))
+
+
+def timed(func):
+    start = time.perf_counter()
+    result = func()
+    return time.perf_counter() - start, result
+
+
+if __name__ == "__main__":
+    arg = sys.argv[1] if len(sys.argv) > 1 else str(NODES)
+    temp = None
+    if arg.isdigit():
+        temp = path = tempfile.mkdtemp(prefix="find-bench-")
+        generate(path, int(arg))
+    else:
+        path = arg
+    try:
+        walk_and_stat(path)  # warm the dentry/inode cache
+        walk_time, walked = timed(lambda: walk_and_stat(path))
+        scan_time, scanned = timed(lambda: load_all(path))
+        files = count_files(walked)
+        assert count_files(scanned) == files
+
+        def lazy_find():
+            root = find_api.load_tree(path)
+            top = next(child for child in root.children if child.ftype == find_api.Ftype.DIRECTORY)
+            return find_api.Find().find_api(top, find_api.ExtensionCriteria("pdf"), limit=10)
+        lazy_time, _ = timed(lazy_find)
+        print(f"files: {files}")
+        print(f"{'loader':>10} {'seconds':>9} {'speedup':>8}")
+        print(f"{'walk+stat':>10} {walk_time:>9.2f} {1:>7.2f}x")
+        print(f"{'scandir':>10} {scan_time:>9.2f} {walk_time / scan_time:>7.2f}x")
+        print(f"{'lazy':>10} {lazy_time:>9.4f} {walk_time / lazy_time:>7.0f}x")
+    finally:
+        if temp:
+            shutil.rmtree(temp)
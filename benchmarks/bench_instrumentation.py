@@ -0,0 +1,68 @@
+"""
+Overhead of the service instrumentation on the assign + pickup hot path.
+
+Modes:
+  * disabled - no metrics attached
+  * enabled  - enable_metrics(ServiceMetrics()): counters and histograms
+  * spans    - as enabled, plus a span hook that collects every span
+
+Disabled is the plain method call path, so it is also the baseline.
+
+run: python benchmarks/bench_instrumentation.py
+"""
+import contextlib
+import io
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from amazon_locker_service import (
+    AmazonLockerService, Customer, Locker, LockerLocation,
+    LockerSize, Order, Package, ServiceMetrics,
+)
+from notifiers import CapturingNotifier
+
+OPERATIONS = 100_000
+ROUNDS = 5
+
+
+def run(service: AmazonLockerService, location_id: str) -> float:
+    location = LockerLocation(location_id, "1 Bench Road")
+    location.add_locker(Locker(f"{location_id}-L0", LockerSize.SMALL))
+    service.add_locker_location(location)
+    customer = Customer("bench", "555-0000")
+    orders = [Order(f"O{i}", customer, Package(f"P{i}", LockerSize.SMALL)) for i in range(OPERATIONS)]
+    with contextlib.redirect_stdout(io.StringIO()):
+        start = time.perf_counter()
+        for order in orders:
+            service.assign_locker_for_order(order, location_id)
+            service.pickup_order(order, service.notifier.last_sent)
+        elapsed = time.perf_counter() - start
+    return elapsed / (2 * OPERATIONS) * 1e9
+
+
+if __name__ == "__main__":
+    service = AmazonLockerService(CapturingNotifier())
+    service.notifier = CapturingNotifier()
+    spans = []
+    modes = {
+        "disabled": None,
+        "enabled": ServiceMetrics(),
+        "spans": ServiceMetrics(span_hook=lambda *span: spans.append(span)),
+    }
+    results = {}
+    for round_ in range(ROUNDS):
+        for name, metrics in modes.items():
+            if metrics:
+                service.enable_metrics(metrics)
+            else:
+                service.disable_metrics()
+            ns = run(service, f"{name}{round_}")
+            results[name] = min(results.get(name, ns), ns)
+            spans.clear()
+    service.disable_metrics()
+    print(f"{'mode':>9} {'ns/op':>8} {'overhead':>9}")
+    for name, ns in results.items():
+        print(f"{name:>9} {ns:>8.0f} {(ns - results['disabled']) / results['disabled']:>8.1%}")
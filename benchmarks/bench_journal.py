@@ -0,0 +1,88 @@
+"""
+Write throughput and startup (replay) time of LockerJournal at 1M active
+orders.
+
+  * assignment throughput with no journal and with group commit sizes
+    1 (fsync per event, measured on a small sample), 100 and 1000
+  * replay time from a journal only, and from a snapshot after checkpoint()
+
+run: python benchmarks/bench_journal.py [directory]
+"""
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from amazon_locker_service import (
+    AmazonLockerService, Customer, LockerJournal, CompactLockerLocation,
+    LockerSize, Order, Package,
+)
+from notifiers import CapturingNotifier
+
+ACTIVE = 1_000_000
+FSYNC_EACH_SAMPLE = 2_000
+LOCATION_ID = "WAL"
+
+
+def fresh_location(service: AmazonLockerService, count: int):
+    location = CompactLockerLocation(LOCATION_ID, "1 Bench Road")
+    location.add_lockers(LockerSize.SMALL, count)
+    service.add_locker_location(location)
+    return location
+
+
+def assign(service: AmazonLockerService, count: int, journal) -> float:
+    fresh_location(service, count)
+    service.attach_journal(journal)
+    customer = Customer("bench", "555-0000")
+    orders = [Order(f"O{i}", customer, Package(f"P{i}", LockerSize.SMALL)) for i in range(count)]
+    start = time.perf_counter()
+    for order in orders:
+        service.assign_locker_for_order(order, LOCATION_ID)
+    if journal:
+        journal.flush()
+    return count / (time.perf_counter() - start)
+
+
+def replay(service: AmazonLockerService, directory: str):
+    fresh_location(service, ACTIVE)
+    journal = LockerJournal(directory)
+    service.attach_journal(journal)
+    start = time.perf_counter()
+    restored = service.recover()
+    elapsed = time.perf_counter() - start
+    assert len(restored) == ACTIVE
+    return journal, elapsed
+
+
+if __name__ == "__main__":
+    base = sys.argv[1] if len(sys.argv) > 1 else tempfile.mkdtemp(prefix="locker-journal-")
+    service = AmazonLockerService(CapturingNotifier())
+    service.notifier = CapturingNotifier()
+    try:
+        print(f"{'mode':>16} {'orders':>9} {'assign/s':>10}")
+        print(f"{'no journal':>16} {ACTIVE:>9} {assign(service, ACTIVE, None):>10.0f}")
+        for group_size, count in ((1, FSYNC_EACH_SAMPLE), (100, ACTIVE), (1000, ACTIVE)):
+            directory = os.path.join(base, f"group{group_size}")
+            journal = LockerJournal(directory, group_size=group_size)
+            rate = assign(service, count, journal)
+            journal.close()
+            print(f"{f'group {group_size}':>16} {count:>9} {rate:>10.0f}")
+
+        directory = os.path.join(base, "group1000")
+        journal, journal_replay = replay(service, directory)
+        start = time.perf_counter()
+        service.checkpoint()
+        checkpoint_time = time.perf_counter() - start
+        journal.close()
+        _, snapshot_replay = replay(service, directory)
+        print()
+        print(f"replay from journal : {journal_replay:.2f}s")
+        print(f"checkpoint          : {checkpoint_time:.2f}s")
+        print(f"replay from snapshot: {snapshot_replay:.2f}s")
+    finally:
+        if len(sys.argv) <= 1:
+            shutil.rmtree(base)
@@ -0,0 +1,82 @@
+"""
+Scaling benchmark for location lookups in AmazonLockerService:
+  * find_locker_location by id (dict registry vs old linear loop)
+  * nearest location with a free locker (grid index vs visiting every location)
+
+Only one location in ten has a free MEDIUM locker, so the nearest query has
+to look past full sites.
+
+run: python benchmarks/bench_location_lookup.py
+"""
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from amazon_locker_service import (
+    LocationGeoIndex, Locker, LockerLocation, LockerSize,
+)
+
+SIZES = [1_000, 10_000, 100_000]
+QUERIES = 1_000
+
+
+def build_locations(n: int, rng: random.Random):
+    locations = []
+    for i in range(n):
+        location = LockerLocation(f"LOC{i}", f"{i} Bench Road",
+                                  rng.uniform(40.0, 45.0), rng.uniform(-75.0, -70.0))
+        if i % 10 == 0:
+            location.add_locker(Locker(f"LOC{i}-L1", LockerSize.MEDIUM))
+        locations.append(location)
+    return locations
+
+
+def linear_find_location(locations, location_id):
+    for loc in locations:
+        if loc.location_id == location_id:
+            return loc
+    return None
+
+
+def linear_nearest(locations, latitude, longitude, size):
+    best, best_dist = None, float('inf')
+    for loc in locations:
+        if not loc.free_lockers[size]:
+            continue
+        dist = ((loc.latitude - latitude) ** 2 + (loc.longitude - longitude) ** 2) ** 0.5
+        if dist < best_dist:
+            best, best_dist = loc, dist
+    return best
+
+
+def per_second(func, args_list) -> float:
+    start = time.perf_counter()
+    for args in args_list:
+        func(*args)
+    return len(args_list) / (time.perf_counter() - start)
+
+
+if __name__ == "__main__":
+    rng = random.Random(7)
+    print(f"{'locations':>10} {'id linear/s':>13} {'id dict/s':>13} {'near linear/s':>14} {'near grid/s':>13}")
+    for n in SIZES:
+        locations = build_locations(n, rng)
+        registry = {loc.location_id: loc for loc in locations}
+        index = LocationGeoIndex()
+        for loc in locations:
+            index.add(loc)
+
+        ids = [(f"LOC{rng.randrange(n)}",) for _ in range(QUERIES)]
+        points = [(rng.uniform(40.0, 45.0), rng.uniform(-75.0, -70.0), LockerSize.MEDIUM)
+                  for _ in range(QUERIES)]
+        for lat, lon, size in points[:50]:
+            assert index.nearest_with_free_locker(lat, lon, size) is linear_nearest(locations, lat, lon, size)
+
+        id_linear = per_second(lambda i: linear_find_location(locations, i), ids[:100])
+        id_dict = per_second(registry.get, ids)
+        near_linear = per_second(lambda *p: linear_nearest(locations, *p), points[:100])
+        near_grid = per_second(index.nearest_with_free_locker, points)
+        print(f"{n:>10} {id_linear:>13.0f} {id_dict:>13.0f} {near_linear:>14.0f} {near_grid:>13.0f}")
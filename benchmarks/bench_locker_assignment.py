@@ -0,0 +1,59 @@
+"""
+Compares locker assignment throughput of the per-size free pools against
+the old linear scan over LockerLocation.lockers.
+
+The location is filled with n lockers and all but the last few are taken,
+which is what a busy site looks like in the morning wave.
+
+run: python benchmarks/bench_locker_assignment.py
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from amazon_locker_service import (
+    Customer, Locker, LockerLocation, LockerSize, LockerState, Order, Package,
+)
+
+SIZES = [10_000, 100_000, 1_000_000]
+ORDERS = 50
+
+
+def linear_find_available_locker(location: LockerLocation, size: LockerSize) -> Locker:
+    for locker in location.lockers:
+        if locker.size == size and locker.state == LockerState.AVAILABLE:
+            return locker
+    return None
+
+
+def build_location(n: int) -> LockerLocation:
+    location = LockerLocation("BENCH", "1 Bench Road")
+    customer = Customer("bench", "555-0000")
+    package = Package("PKG", LockerSize.MEDIUM)
+    for i in range(n):
+        locker = Locker(f"L{i}", LockerSize.MEDIUM)
+        location.add_locker(locker)
+        if i < n - ORDERS:
+            locker.assign_order(Order(f"PRE{i}", customer, package))
+    return location
+
+
+def run(n: int, find) -> float:
+    location = build_location(n)
+    customer = Customer("bench", "555-0000")
+    package = Package("PKG", LockerSize.MEDIUM)
+    start = time.perf_counter()
+    for i in range(ORDERS):
+        locker = find(location, LockerSize.MEDIUM)
+        locker.assign_order(Order(f"ORD{i}", customer, package))
+    return ORDERS / (time.perf_counter() - start)
+
+
+if __name__ == "__main__":
+    print(f"{'lockers':>10} {'linear/s':>14} {'pooled/s':>14} {'speedup':>10}")
+    for n in SIZES:
+        linear = run(n, linear_find_available_locker)
+        pooled = run(n, LockerLocation.find_available_locker)
+        print(f"{n:>10} {linear:>14.0f} {pooled:>14.0f} {pooled / linear:>9.1f}x")
@@ -0,0 +1,60 @@
+"""
+Memory per locker for the object model (LockerLocation + Locker objects)
+versus CompactLockerLocation (typed arrays + views).
+
+Each measurement runs in a fresh interpreter and reports the growth in peak
+RSS. The object model at 10M lockers does not fit in a small box, so it is
+skipped when the estimate exceeds MAX_BYTES and the per-locker cost at 1M
+is extrapolated instead.
+
+run: python benchmarks/bench_locker_memory.py
+"""
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SIZES = [1_000_000, 10_000_000]
+MAX_BYTES = 3 * 1024 ** 3
+
+CHILD = """
+import resource, sys, time
+sys.path.insert(0, {root!r})
+from amazon_locker_service import CompactLockerLocation, Locker, LockerLocation, LockerSize
+n = {n}
+before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+start = time.perf_counter()
+if {compact}:
+    location = CompactLockerLocation("LOC", "1 Bench Road")
+    location.add_lockers(LockerSize.MEDIUM, n)
+else:
+    location = LockerLocation("LOC", "1 Bench Road")
+    for i in range(n):
+        location.add_locker(Locker(f"LOC-L{{i}}", LockerSize.MEDIUM))
+elapsed = time.perf_counter() - start
+after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+print((after - before) * 1024, elapsed)
+"""
+
+
+def measure(n: int, compact: bool):
+    code = CHILD.format(root=ROOT, n=n, compact=compact)
+    output = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True).stdout
+    rss, elapsed = output.split()
+    return int(rss), float(elapsed)
+
+
+if __name__ == "__main__":
+    print(f"{'lockers':>10} {'backend':>8} {'MB':>10} {'bytes/locker':>13} {'build s':>8}")
+    object_per_locker = None
+    for n in SIZES:
+        for compact in (False, True):
+            name = "compact" if compact else "object"
+            if not compact and object_per_locker and object_per_locker * n > MAX_BYTES:
+                print(f"{n:>10} {name:>8} {object_per_locker * n / 2 ** 20:>9.0f}~ "
+                      f"{object_per_locker:>13.0f} {'skipped':>8}")
+                continue
+            rss, elapsed = measure(n, compact)
+            if not compact:
+                object_per_locker = rss / n
+            print(f"{n:>10} {name:>8} {rss / 2 ** 20:>10.0f} {rss / n:>13.1f} {elapsed:>8.2f}")
@@ -0,0 +1,129 @@
+"""
+Memory and construction time of 1M and 10M node trees for
+  * dict  - the previous node layout: plain classes with an attribute
+            dict per instance, names not interned
+  * slots - the slotted, interned nodes in linux-find-api.py
+plus the cost of emptying one wide directory child by child
+(list.remove against the O(1) removal from the ordered children dict).
+
+Each tree is built in its own child process and measured by the growth of
+its peak RSS. A run that does not fit in memory is reported as failed.
+
+run: python benchmarks/bench_node_memory.py [NODES ...]
+"""
+import importlib.util
+import os
+import random
+import resource
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SIZES = [1_000_000, 10_000_000]
+FANOUT = 100
+EXTENSIONS = ["pdf", "xml", "txt", "jpg", "py"]
+WIDE = 20_000
+
+
+def load_find_api():
+    spec = importlib.util.spec_from_file_location("linux_find_api", os.path.join(ROOT, "linux-find-api.py"))
+    find_api = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(find_api)
+    return find_api
+
+
+class DictNode:
+    def __init__(self, ftype, name: str, size: int):
+        self.ftype = ftype
+        self.name = name
+        self.size = size
+        self.parent = None
+
+
+class DictFile(DictNode):
+    def __init__(self, name: str, ext: str, size: int, mtime: float = None):
+        super().__init__(0, name, size)
+        self.ext = ext
+        self.mtime = mtime
+
+
+class DictDirectory(DictNode):
+    def __init__(self, name: str):
+        super().__init__(1, name, 0)
+        self.children = []
+        self.index = None
+
+    def add_child(self, node):
+        self.children.append(node)
+        node.parent = self
+        self.size += node.size
+
+    def remove_child(self, node):
+        self.children.remove(node)
+        node.parent = None
+        self.size -= node.size
+
+
+def build(file_cls, dir_cls, nodes: int):
+    root = dir_cls("/")
+    directory = None
+    for i in range(nodes):
+        if i % (FANOUT + 1) == 0:
+            directory = dir_cls(f"d{i}")
+            root.add_child(directory)
+        else:
+            # fresh strings for every node, as names read from disk would be
+            directory.add_child(file_cls(f"f{i % FANOUT}", "".join(EXTENSIONS[i % 5]), i % 4096))
+    return root
+
+
+def classes(layout: str):
+    if layout == "dict":
+        return DictFile, DictDirectory
+    find_api = load_find_api()
+    return find_api.File, find_api.Directory
+
+
+def measure(layout: str, nodes: int):
+    file_cls, dir_cls = classes(layout)
+    before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    start = time.perf_counter()
+    tree = build(file_cls, dir_cls, nodes)
+    elapsed = time.perf_counter() - start
+    grown = (resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - before) * 1024
+    print(f"{elapsed} {grown}")
+    return tree
+
+
+def wide_removal(layout: str) -> float:
+    file_cls, dir_cls = classes(layout)
+    directory = dir_cls("wide")
+    files = [file_cls(f"f{i}", "txt", 1) for i in range(WIDE)]
+    for file in files:
+        directory.add_child(file)
+    random.Random(3).shuffle(files)
+    start = time.perf_counter()
+    for file in files:
+        directory.remove_child(file)
+    return time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    if len(sys.argv) == 4 and sys.argv[1] == "--child":
+        measure(sys.argv[2], int(sys.argv[3]))
+        sys.exit(0)
+    sizes = [int(arg) for arg in sys.argv[1:]] or SIZES
+    print(f"{'nodes':>11} {'layout':>6} {'build s':>8} {'MB':>8} {'bytes/node':>11}")
+    for nodes in sizes:
+        for layout in ("dict", "slots"):
+            run = subprocess.run([sys.executable, __file__, "--child", layout, str(nodes)],
+                                 capture_output=True, text=True)
+            if run.returncode != 0:
+                print(f"{nodes:>11} {layout:>6} {'failed (out of memory?)':>30}")
+                continue
+            elapsed, grown = map(float, run.stdout.split())
+            print(f"{nodes:>11} {layout:>6} {elapsed:>8.2f} {grown / 2 ** 20:>8.0f} {grown / nodes:>11.0f}")
+    print(f"\nemptying a {WIDE} child directory:")
+    for layout in ("dict", "slots"):
+        print(f"{layout:>6} {wide_removal(layout):>8.3f}s")
@@ -0,0 +1,72 @@
+"""
+Load test of kiosk code entry: how many typed OTPs per second resolve to a
+locker through LockerLocation.find_locker_by_otp, against scanning the
+location's lockers for an order with that OTP. A quarter of the entries
+are wrong codes. Also reports full pickup_by_code throughput.
+
+run: python benchmarks/bench_otp_lookup.py
+"""
+import contextlib
+import io
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from amazon_locker_service import (
+    AmazonLockerService, Customer, Locker, LockerLocation, LockerSize, Order,
+    Package,
+)
+from notifiers import CapturingNotifier
+
+SIZES = [1_000, 10_000, 100_000]
+ENTRIES = 20_000
+
+
+def scan_for_otp(location: LockerLocation, otp: str) -> Locker:
+    otp_hash = location.hash_otp(otp)
+    for locker in location.lockers:
+        if location.otp_hashes.get(locker.locker_id) == otp_hash:
+            return locker
+    return None
+
+
+def per_second(func, location, codes) -> float:
+    start = time.perf_counter()
+    for code in codes:
+        func(location, code)
+    return len(codes) / (time.perf_counter() - start)
+
+
+if __name__ == "__main__":
+    service = AmazonLockerService(CapturingNotifier())
+    service.notifier = CapturingNotifier(digits=8)
+    rng = random.Random(5)
+    customer = Customer("kiosk", "555-0000")
+    print(f"{'occupied':>9} {'scan/s':>10} {'index/s':>10} {'pickups/s':>10}")
+    for n in SIZES:
+        location_id = f"KIOSK{n}"
+        location = LockerLocation(location_id, "1 Kiosk Road")
+        for i in range(n):
+            location.add_locker(Locker(f"{location_id}-L{i}", LockerSize.SMALL))
+        service.add_locker_location(location)
+        orders = [Order(f"{location_id}-O{i}", customer, Package(f"P{i}", LockerSize.SMALL)) for i in range(n)]
+        service.notifier.sent.clear()
+        for order in orders:
+            service.assign_locker_for_order(order, location_id)
+        sent = service.notifier.sent
+
+        codes = [rng.choice(sent) if rng.random() < 0.75 else f"{rng.randrange(10 ** 8):08d}"
+                 for _ in range(ENTRIES)]
+        scan = per_second(scan_for_otp, location, codes[:max(20, 200_000 // n)])
+        index = per_second(LockerLocation.find_locker_by_otp, location, codes)
+
+        pickup_codes = rng.sample(sent, min(n, ENTRIES))
+        with contextlib.redirect_stdout(io.StringIO()):
+            start = time.perf_counter()
+            for code in pickup_codes:
+                assert service.pickup_by_code(location_id, code) is not None
+            pickups = len(pickup_codes) / (time.perf_counter() - start)
+        print(f"{n:>9} {scan:>10.0f} {index:>10.0f} {pickups:>10.0f}")
@@ -0,0 +1,85 @@
+"""
+Game.best_rule through the RankTable (one lookup on the hand's packed
+rank key) against evaluating every rule on the hand, in hands per second.
+
+Before timing, every 5 card hand over values 1-10 and symbols A-B (as a
+multiset, order does not matter to any rule) is checked against the rule
+classes themselves, for every ordering of the three rule ranks and with a
+rank 0 lucky rule.
+
+run: python benchmarks/bench_rank_table.py
+"""
+import itertools
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from poker import Card, Flush, Game, Hand, Pair, ThreeOfAKind
+
+VALUES = range(1, 11)
+SYMBOLS = "AB"
+HANDS = 200_000
+
+
+def rule_sets():
+    rules = [Flush(), ThreeOfAKind(), Pair()]
+    for ranks in itertools.permutations([1, 2, 3]):
+        yield dict(zip(rules, ranks))
+    yield {Flush(): 1, ThreeOfAKind(): 2, Pair(): 0}
+
+
+def make_hand(cards) -> Hand:
+    hand = Hand()
+    for value, symbol in cards:
+        hand.add_card(Card(value, symbol))
+    return hand
+
+
+def reference_best(rules: dict, hand: Hand):
+    win_rule, win_rank = None, float('inf')
+    for rule, rank in rules.items():
+        if rule.evaluate(hand) and rank < win_rank:
+            win_rule, win_rank = rule.get_rule(), rank
+    return win_rule
+
+
+def exhaustive_check() -> int:
+    cards = [(value, symbol) for value in VALUES for symbol in SYMBOLS]
+    checked = 0
+    for rules in rule_sets():
+        for combo in itertools.combinations_with_replacement(cards, 5):
+            hand = make_hand(combo)
+            game = Game(hand)
+            game.set_rules(dict(rules))
+            assert game.best_rule() == reference_best(rules, hand), (hand, rules)
+            checked += 1
+    return checked
+
+
+def per_second(games) -> float:
+    start = time.perf_counter()
+    for game in games:
+        game.best_rule()
+    return len(games) / (time.perf_counter() - start)
+
+
+if __name__ == "__main__":
+    print(f"exhaustive check: {exhaustive_check()} hand/rule set pairs match the rule classes")
+    rng = random.Random(2)
+    rules = {Flush(): 1, ThreeOfAKind(): 2, Pair(): 3}
+    hands = [make_hand((rng.choice(VALUES), rng.choice(SYMBOLS)) for _ in range(5)) for _ in range(HANDS)]
+    table_games, loop_games = [], []
+    for hand in hands:
+        for games in (table_games, loop_games):
+            game = Game(hand)
+            game.set_rules(rules)
+            games.append(game)
+        loop_games[-1].table = None  # force the rule by rule path
+    loop = per_second(loop_games)
+    table = per_second(table_games)
+    print(f"{'path':>6} {'hands/s':>12} {'speedup':>8}")
+    print(f"{'rules':>6} {loop:>12,.0f} {1:>7.1f}x")
+    print(f"{'table':>6} {table:>12,.0f} {table / loop:>7.1f}x")
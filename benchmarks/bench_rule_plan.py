@@ -0,0 +1,87 @@
+"""
+Game.evaluate_hand with large custom rule sets: the rank ordered plan that
+stops at the first match against the previous evaluation of every rule in
+dict order. Each custom rule "at least k cards of value v" is its own
+IRule class (rules are singletons per class), and ranks are shuffled so
+dict order and rank order differ. A rank 0 lucky rule is measured too.
+
+Both paths must pick the same rule and rank for every hand.
+
+run: python benchmarks/bench_rule_plan.py
+"""
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from poker import Card, Game, Hand, IRule
+
+RULE_COUNTS = [10, 100, 1_000]
+HANDS = 5_000
+
+
+def custom_rules(count: int, rng: random.Random) -> dict:
+    rules = []
+    for i in range(count):
+        value, k = 1 + i % 10, 1 + (i // 10) % 3
+
+        def matches(self, histogram, value=value, k=k):
+            return histogram.value_counts.get(value, 0) >= k
+
+        cls = type(f"AtLeast{k}Of{value}_{i}", (IRule,), {
+            "get_rule": lambda self, name=f"{k}x{value}#{i}": name,
+            "matches": matches,
+        })
+        rules.append(cls())
+    ranks = list(range(1, count + 1))
+    rng.shuffle(ranks)
+    return dict(zip(rules, ranks))
+
+
+def evaluate_all(rules: dict, hand: Hand):
+    win_rule, win_rank = None, float('inf')
+    for rule, rank in rules.items():
+        if rule.evaluate(hand) and rank < win_rank:
+            win_rule, win_rank = rule.get_rule(), rank
+    return win_rule, win_rank if win_rule else None
+
+
+def random_hand(rng: random.Random) -> Hand:
+    hand = Hand()
+    for _ in range(5):
+        hand.add_card(Card(rng.randint(1, 10), rng.choice("AB")))
+    return hand
+
+
+def per_second(func, hands) -> float:
+    start = time.perf_counter()
+    for hand in hands:
+        func(hand)
+    return len(hands) / (time.perf_counter() - start)
+
+
+if __name__ == "__main__":
+    rng = random.Random(6)
+    hands = [random_hand(rng) for _ in range(HANDS)]
+    for hand in hands:
+        hand.histogram()  # built once per hand whichever path runs first
+    print(f"{'rules':>6} {'lucky':>6} {'all rules/s':>12} {'plan/s':>10} {'speedup':>8}")
+    for count in RULE_COUNTS:
+        rules = custom_rules(count, rng)
+        for lucky in (False, True):
+            if lucky:
+                rules[next(iter(rules))] = 0  # what set_lucky_rule does
+
+            def plan(hand):
+                game = Game(hand)
+                game.set_rules(rules)
+                return game.evaluate_hand()
+
+            for hand in hands[:500]:
+                result = plan(hand)
+                assert (result.rule, result.rank) == evaluate_all(rules, hand)
+            old = per_second(lambda hand: evaluate_all(rules, hand), hands)
+            new = per_second(plan, hands)
+            print(f"{count:>6} {str(lucky):>6} {old:>12,.0f} {new:>10,.0f} {new / old:>7.1f}x")
@@ -0,0 +1,71 @@
+"""
+Shared singleton rules scoring hands from 1 to 8 threads. Every thread runs
+the rule by rule path of Game.best_rule over the same Hand objects (fresh
+hands each round, so the histograms are built concurrently too) and every
+result is checked against per hand card counts.
+
+Throughput is bounded by the GIL; the point is that sharing is correct.
+
+run: python benchmarks/bench_rule_threads.py
+"""
+import os
+import random
+import sys
+import threading
+import time
+from collections import Counter
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from poker import Card, Flush, Game, Hand, Pair, RuleName, ThreeOfAKind
+
+HANDS = 20_000
+THREADS = [1, 2, 4, 8]
+SYMBOLS = "ABCD"
+
+
+def random_cards(rng: random.Random):
+    return [[(rng.randint(1, 10), rng.choice(SYMBOLS)) for _ in range(5)] for _ in range(HANDS)]
+
+
+def expected(cards) -> RuleName:
+    if len({symbol for _, symbol in cards}) == 1:
+        return RuleName.Flush
+    most = max(Counter(value for value, _ in cards).values())
+    return RuleName.ThreeOfAKind if most >= 3 else RuleName.Pair if most >= 2 else None
+
+
+def make_hand(cards) -> Hand:
+    hand = Hand()
+    for value, symbol in cards:
+        hand.add_card(Card(value, symbol))
+    return hand
+
+
+def score(hands, wanted, rules, errors):
+    for hand, want in zip(hands, wanted):
+        game = Game(hand)
+        game.set_rules(rules)
+        game.table = None  # rule by rule, through the shared singletons
+        if game.best_rule() != want:
+            errors.append(hand)
+
+
+if __name__ == "__main__":
+    rng = random.Random(4)
+    deals = random_cards(rng)
+    wanted = [expected(cards) for cards in deals]
+    rules = {Flush(): 1, ThreeOfAKind(): 2, Pair(): 3}
+    print(f"{'threads':>8} {'hands/s':>12} {'errors':>7}")
+    for count in THREADS:
+        hands = [make_hand(cards) for cards in deals]
+        errors = []
+        threads = [threading.Thread(target=score, args=(hands, wanted, rules, errors)) for _ in range(count)]
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - start
+        print(f"{count:>8} {count * HANDS / elapsed:>12,.0f} {len(errors):>7}")
+        assert not errors
@@ -0,0 +1,113 @@
+"""
+Mutation heavy workload on a tree of about 1M nodes (depth 6):
+random file resizes, adds and removes, with
+  * incremental - propagate_size up the parent pointers on every change
+                  (plain tree, and a tree with a FileIndex)
+  * recompute   - the alternative without parent pointers: one full
+                  bottom-up recomputation of every directory total
+and the du-style top 10 query from the FileIndex against a full walk.
+
+run: python benchmarks/bench_size_aggregation.py
+"""
+import heapq
+import importlib.util
+import os
+import random
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+spec = importlib.util.spec_from_file_location("linux_find_api", os.path.join(ROOT, "linux-find-api.py"))
+find_api = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(find_api)
+
+FANOUT = 10
+LEVELS = 5  # 10^5 leaf directories of FANOUT files each
+OPERATIONS = 100_000
+
+
+def build():
+    random.seed(7)
+    root = find_api.Directory("/")
+    level, dirs, files = [root], [], []
+    for depth in range(LEVELS):
+        below = []
+        for parent in level:
+            for i in range(FANOUT):
+                child = find_api.Directory(f"d{depth}-{i}")
+                parent.add_child(child)
+                below.append(child)
+        dirs.extend(below)
+        level = below
+    for directory in level:
+        for i in range(FANOUT):
+            file = find_api.File(f"f{i}", "dat", random.randrange(1 << 20))
+            directory.add_child(file)
+            files.append(file)
+    return root, dirs, files
+
+
+def mutate(dirs, files, operations: int):
+    rng = random.Random(11)
+    added = 0
+    for _ in range(operations):
+        roll = rng.random()
+        if roll < 0.5:
+            rng.choice(files).resize(rng.randrange(1 << 20))
+        elif roll < 0.75:
+            file = find_api.File(f"n{added}", "dat", rng.randrange(1 << 20))
+            dirs[-1 - rng.randrange(FANOUT ** LEVELS)].add_child(file)
+            files.append(file)
+            added += 1
+        else:
+            i = rng.randrange(len(files))
+            files[i], files[-1] = files[-1], files[i]
+            file = files.pop()
+            file.parent.remove_child(file)
+
+
+def recompute(root) -> int:
+    # post order: totals of children before their parent
+    order, stack = [], [root]
+    while stack:
+        node = stack.pop()
+        order.append(node)
+        stack.extend(child for child in node.children if child.ftype == find_api.Ftype.DIRECTORY)
+    for node in reversed(order):
+        node.size = sum(child.size for child in node.children)
+    return root.size
+
+
+def walk_largest(root, k: int):
+    dirs, stack = [], list(root.children)
+    while stack:
+        node = stack.pop()
+        if node.ftype == find_api.Ftype.DIRECTORY:
+            dirs.append(node)
+            stack.extend(node.children)
+    return heapq.nlargest(k, dirs, key=lambda node: node.size)
+
+
+def timed(func):
+    start = time.perf_counter()
+    result = func()
+    return time.perf_counter() - start, result
+
+
+if __name__ == "__main__":
+    print(f"{'workload':>24} {'seconds':>9} {'us/op':>8}")
+    for indexed in (False, True):
+        root, dirs, files = build()
+        if indexed:
+            root.build_index()
+        elapsed, _ = timed(lambda: mutate(dirs, files, OPERATIONS))
+        label = "incremental + index" if indexed else "incremental"
+        print(f"{label:>24} {elapsed:>9.2f} {elapsed / OPERATIONS * 1e6:>8.2f}")
+        total = root.size
+        recompute_time, recomputed = timed(lambda: recompute(root))
+        assert recomputed == total
+    print(f"{'one full recompute':>24} {recompute_time:>9.2f}")
+
+    index_time, top = timed(lambda: root.largest_subtrees(10))
+    walk_time, expected = timed(lambda: walk_largest(root, 10))
+    assert [node.size for node in top] == [node.size for node in expected]
+    print(f"\nlargest 10 subtrees: index {index_time * 1e3:.3f} ms, walk {walk_time * 1e3:.1f} ms")
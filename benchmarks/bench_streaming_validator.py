@@ -0,0 +1,120 @@
+"""
+StreamingParanthesisChecker over multi-GB inputs read from disk in 1 MiB
+chunks, against ParanthesisChecker.validate on an in-memory string.
+
+  * valid     - SIZE_GB of nested brackets (depth up to 32), written to a
+                temp file, validated with validate_stream
+  * error     - 64 MiB in memory with one wrong bracket; the reported
+                offset must be the one that was broken
+  * deep      - 256 MiB of opens then closes: 128M levels of nesting, the
+                worst case for the stack (one byte per level)
+  * validate  - the original checker on a 64 MiB string
+
+Peak RSS growth is reported next to each run.
+
+run: python benchmarks/bench_streaming_validator.py [SIZE_GB]
+"""
+import contextlib
+import io
+import os
+import random
+import resource
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from valid_paranthesis import ParanthesisChecker, RegularBracketService, StreamingParanthesisChecker
+
+SIZE_GB = 2
+BLOCK = 1 << 20
+PAIRS = ["{}", "()", "[]"]
+
+
+def service():
+    brackets = RegularBracketService()
+    for open, close in PAIRS:
+        brackets.add_pair(open, close)
+    return brackets
+
+
+def valid_block(rng: random.Random, size: int) -> bytes:
+    closer = {open: close for open, close in PAIRS}
+    out, stack = [], []
+    while len(out) + len(stack) < size:
+        if stack and (len(stack) == 32 or rng.random() < 0.5):
+            out.append(closer[stack.pop()])
+        else:
+            stack.append(rng.choice("{(["))
+            out.append(stack[-1])
+    out.extend(closer[open] for open in reversed(stack))
+    return "".join(out).encode()
+
+
+def rss_mb() -> float:
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def run(label: str, size: int, func):
+    before = rss_mb()
+    start = time.perf_counter()
+    result = func()
+    elapsed = time.perf_counter() - start
+    print(f"{label:>9} {size / 2 ** 30:>7.2f} {elapsed:>8.2f} {size / elapsed / 2 ** 20:>8.0f} "
+          f"{rss_mb() - before:>9.0f} {result!s:>12}")
+
+
+if __name__ == "__main__":
+    size_gb = float(sys.argv[1]) if len(sys.argv) > 1 else SIZE_GB
+    rng = random.Random(8)
+    block = valid_block(rng, BLOCK)
+    blocks = int(size_gb * (1 << 30) // len(block))
+    print(f"{'run':>9} {'GiB':>7} {'seconds':>8} {'MiB/s':>8} {'RSS +MB':>9} {'result':>12}")
+
+    with tempfile.TemporaryDirectory() as temp:
+        path = os.path.join(temp, "brackets.txt")
+        with open(path, "wb") as out:
+            for _ in range(blocks):
+                out.write(block)
+
+        def stream_file():
+            checker = StreamingParanthesisChecker(service())
+            with open(path, "rb") as stream:
+                assert checker.validate_stream(stream)
+            return checker.finish()
+        run("valid", blocks * len(block), stream_file)
+
+    broken = bytearray(block * 64)
+    bad = len(broken) - 12345
+    broken[bad] = ord("x")
+
+    def find_error():
+        checker = StreamingParanthesisChecker(service())
+        assert not checker.validate_stream(io.BytesIO(broken))
+        assert checker.error_offset == bad
+        return f"at {checker.error_offset}"
+    run("error", len(broken), find_error)
+    del broken
+
+    depth = 128 << 20
+
+    def deep():
+        checker = StreamingParanthesisChecker(service())
+        for _ in range(depth // BLOCK):
+            checker.feed(b"(" * BLOCK)
+        top = checker.depth
+        for _ in range(depth // BLOCK):
+            checker.feed(b")" * BLOCK)
+        assert checker.finish()
+        return f"depth {top >> 20}M"
+    run("deep", 2 * depth, deep)
+
+    text = (block * 64).decode()
+
+    def original():
+        checker = ParanthesisChecker(service())
+        with contextlib.redirect_stdout(io.StringIO()) as output:
+            checker.validate(text)
+        return output.getvalue().endswith(" is valid paranthesis\n")
+    run("validate", len(text), original)
@@ -0,0 +1,44 @@
+"""
+Notifier shared by the locker benchmarks. Orders keep only a hash of their
+OTP once it is sent, so a benchmark that picks orders up reads the codes
+back from here.
+
+Import it after amazon_locker_service, once the repository root is on
+sys.path.
+"""
+import itertools
+import threading
+
+from amazon_locker_service import INotifier
+
+
+class CapturingNotifier(INotifier):
+    """
+    Sends nothing. Hands out sequential codes, counts gateway round trips
+    (a batch is one) and keeps every code sent, in order, in `sent`.
+    """
+    def __init__(self, digits: int = 6):
+        self.digits = digits
+        self.codes = itertools.count()
+        self.sent = []
+        self.gateway_calls = 0
+        self._local = threading.local()
+
+    @property
+    def last_sent(self) -> str:
+        """
+        The last code sent from the calling thread.
+        """
+        return getattr(self._local, "last_sent", None)
+
+    def send_otp(self, phone: str, otp: str, message: str):
+        self.gateway_calls += 1
+        self.sent.append(otp)
+        self._local.last_sent = otp
+
+    def send_otp_batch(self, messages: list):
+        self.gateway_calls += 1
+        self.sent.extend(otp for _, otp, _ in messages)
+
+    def generate_otp(self) -> str:
+        return f"{next(self.codes):0{self.digits}d}"
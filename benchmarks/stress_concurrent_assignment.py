@@ -0,0 +1,99 @@
+"""
+Multithreaded stress harness for AmazonLockerService.
+
+Threads race to assign orders across many locations until every locker is
+taken, then pick every order up again. After each phase it checks that
+no locker holds two orders and that the free pools match locker states.
+Throughput is reported per thread count.
+
+run: python benchmarks/stress_concurrent_assignment.py
+"""
+import contextlib
+import io
+import os
+import random
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from amazon_locker_service import (
+    AmazonLockerService, Customer, Locker, LockerLocation,
+    LockerSize, LockerState, Order, Package,
+)
+from notifiers import CapturingNotifier
+
+THREADS = [1, 2, 4, 8, 16]
+LOCATIONS = 200
+LOCKERS_PER_LOCATION = 100
+
+
+def build(service: AmazonLockerService, run_id: int):
+    location_ids = []
+    for i in range(LOCATIONS):
+        location = LockerLocation(f"R{run_id}-LOC{i}", f"{i} Stress Street")
+        for j in range(LOCKERS_PER_LOCATION):
+            location.add_locker(Locker(f"R{run_id}-LOC{i}-L{j}", LockerSize.SMALL))
+        service.add_locker_location(location)
+        location_ids.append(location.location_id)
+    customer = Customer("stress", "555-0000")
+    orders = [(Order(f"R{run_id}-O{i}", customer, Package(f"P{i}", LockerSize.SMALL)),
+               location_ids[i % LOCATIONS])
+              for i in range(LOCATIONS * LOCKERS_PER_LOCATION)]
+    random.Random(run_id).shuffle(orders)
+    return location_ids, orders
+
+
+def run_threads(count: int, work, items):
+    chunks = [items[i::count] for i in range(count)]
+    threads = [threading.Thread(target=work, args=(chunk,)) for chunk in chunks]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return time.perf_counter() - start
+
+
+def check(service: AmazonLockerService, location_ids, orders, expect_assigned: bool):
+    seen = set()
+    for order, _ in orders:
+        if expect_assigned:
+            assert order.locker is not None, f"{order.order_id} got no locker"
+            assert order.locker.locker_id not in seen, f"{order.locker.locker_id} double-assigned"
+            assert order.locker.assigned_order is order
+            seen.add(order.locker.locker_id)
+    for location_id in location_ids:
+        location = service.find_locker_location(location_id)
+        free = sum(locker.state == LockerState.AVAILABLE for locker in location.lockers)
+        assert free == len(location.free_lockers[LockerSize.SMALL])
+        assert free == (0 if expect_assigned else LOCKERS_PER_LOCATION)
+
+
+if __name__ == "__main__":
+    service = AmazonLockerService(CapturingNotifier())
+    service.notifier = CapturingNotifier()
+    total = LOCATIONS * LOCKERS_PER_LOCATION
+    print(f"{'threads':>8} {'assign/s':>12} {'pickup/s':>12}")
+    for run_id, count in enumerate(THREADS):
+        location_ids, orders = build(service, run_id)
+        otps = {}
+
+        def assign(chunk):
+            for order, location_id in chunk:
+                if service.assign_locker_for_order(order, location_id):
+                    otps[order.order_id] = service.notifier.last_sent
+
+        def pickup(chunk):
+            for order, _ in chunk:
+                service.pickup_order(order, otps[order.order_id])
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            assign_time = run_threads(count, assign, orders)
+        check(service, location_ids, orders, expect_assigned=True)
+        with contextlib.redirect_stdout(io.StringIO()):
+            pickup_time = run_threads(count, pickup, orders)
+        check(service, location_ids, orders, expect_assigned=False)
+        print(f"{count:>8} {total / assign_time:>12.0f} {total / pickup_time:>12.0f}")
+    print("no double assignments detected")
@@ -1,8 +1,15 @@
+import bisect
+import heapq
+import multiprocessing
+import os
+import sys
+from collections import OrderedDict
 from abc import abstractmethod
 from enum import Enum
 
 """
-This is recursive find implementation
+This is iterative find implementation: an explicit stack of child iterators
+walks the tree depth first and yields matches lazily
 """
 class Ftype(Enum):
     FILE = 0
@@ -10,11 +17,17 @@ class Ftype(Enum):
     SYMLINK = 2
 
 
+# nodes are slotted and names/extensions interned, so a node costs a few
+# pointers instead of an attribute dict and repeated names share one string
 class IFileNode:
+    __slots__ = ("ftype", "name", "size", "parent", "position")
+
     def __init__(self,ftype: str,  name: str,  size: int):
         self.ftype = ftype
-        self.name = name
+        self.name = sys.intern(name)
         self.size = size
+        self.parent = None
+        self.position = 0  # order among the parent's children, by insertion
 
     def get_name(self):
         return self.name
@@ -26,34 +39,188 @@ class IFileNode:
         return f'{self.name} - {self.ftype}'
 
 class File(IFileNode):
-    def __init__(self, name: str, ext: str, size: int):
-        super().__init__(Ftype.FILE, name, size)
-        self.ext = ext
+    __slots__ = ("ext", "mtime")
 
+    def __init__(self, name: str, ext: str, size: int, mtime: float = None):
+        super().__init__(Ftype.FILE, name, size)
+        self.ext = sys.intern(ext)
+        self.mtime = mtime
+
+    # changes the file's size in place; every ancestor directory total and
+    # the indexes follow in O(depth). directory sizes are subtree totals, so
+    # they only change through their files
+    def resize(self, size: int):
+        parent = self.parent
+        if parent is not None and parent.index is not None:
+            parent.index.resize_file(self, size)
+        delta, self.size = size - self.size, size
+        if parent is not None and delta:
+            parent.propagate_size(delta)
+
+class Symlink(IFileNode):
+    __slots__ = ("target", "mtime")
+    children = ()  # links are not followed
+
+    def __init__(self, name: str, target: str, size: int, mtime: float = None):
+        super().__init__(Ftype.SYMLINK, name, size)
+        self.target = target
+        self.mtime = mtime
+
+# size is the total of the whole subtree: add_child, remove_child and
+# File.resize push the change up the parent pointers to every ancestor.
+# children is a dict of child -> None: insertion ordered like a list, but a
+# removal is O(1) and leaves the order of the other children as it was.
+# version counts changes anywhere below, for FindCache
 class Directory(IFileNode):
+    __slots__ = ("children", "index", "version")
+
     def __init__(self, name: str, children: list[IFileNode] = None, size: int = 0):
         super().__init__(Ftype.DIRECTORY, name, size)
-        self.children = children if children is not None else []
+        self.children = dict.fromkeys(children) if children else {}
+        self.index = None  # FileIndex of the indexed tree this directory is in
+        self.version = 0
+        for position, child in enumerate(children or ()):
+            child.parent, child.position = self, position
         
     def add_child(self, fileNode : IFileNode):
-        self.children.append(fileNode)
-        self.size += fileNode.get_size()
+        children = self.children
+        fileNode.parent = self
+        fileNode.position = next(reversed(children)).position + 1 if children else 0
+        children[fileNode] = None
+        self.propagate_size(fileNode.size)
+        if self.index is not None:
+            self.index.add_subtree(fileNode)
         
 
     def remove_child(self, fileNode: IFileNode):
-        if fileNode not in self.children:
+        if fileNode.parent is not self:
             raise ValueError(f"{fileNode} not found in {self.name} dir")
-        self.children.remove(fileNode)
-        self.size -= fileNode.get_size()
+        if self.index is not None:
+            self.index.remove_subtree(fileNode)
+        del self.children[fileNode]
+        fileNode.parent = None
+        self.propagate_size(-fileNode.size)
+
+    # applies a size change to this directory and every ancestor, and bumps
+    # their versions
+    def propagate_size(self, delta: int):
+        node = self
+        while node is not None:
+            node.version += 1
+            if delta:
+                node.size += delta
+                if node.index is not None:
+                    node.index.resize_dir(node)
+            node = node.parent
+
+    # the k largest directories below this one, by total size. an index
+    # lookup when this directory is the root of its FileIndex, else a walk
+    def largest_subtrees(self, k: int = 10):
+        if self.index is not None and self.index.root is self:
+            return self.index.largest_dirs(k)
+        dirs = []
+        stack = list(self.children)
+        while stack:
+            node = stack.pop()
+            if node.ftype == Ftype.DIRECTORY:
+                dirs.append(node)
+                stack.extend(node.children)
+        return heapq.nlargest(k, dirs, key=lambda node: node.size)
+
+    # indexes every file below this directory; add_child/remove_child
+    # anywhere in the tree keep the index up to date from then on
+    def build_index(self):
+        self.index = FileIndex(self)
+        self.index.add_subtree(*self.children)
+        return self.index
+
+
+# directory read from disk with os.scandir the first time its children are
+# needed. size and mtime come from the scandir entries and are cached on the
+# nodes; size counts what is loaded, subdirectories add theirs once loaded
+class LazyDirectory(Directory):
+    __slots__ = ("_children", "path", "mtime")
+
+    def __init__(self, name: str, path: str, mtime: float = None):
+        super().__init__(name)  # the children setter leaves it unloaded
+        self.path = path
+        self.mtime = mtime
+
+    @property
+    def loaded(self):
+        return self._children is not None
+
+    @property
+    def children(self):
+        if self._children is None:
+            self._load()
+        return self._children
+
+    @children.setter
+    def children(self, children: dict):
+        self._children = children or None
+
+    def _load(self):
+        self._children = children = {}
+        total = 0
+        try:
+            with os.scandir(self.path) as entries:
+                for entry in entries:
+                    node = self._node_for(entry)
+                    if node is not None:
+                        node.parent, node.position = self, len(children)
+                        children[node] = None
+                        total += node.size
+        except (PermissionError, FileNotFoundError, NotADirectoryError):
+            pass
+        if total:
+            self.propagate_size(total)
+        # inside add_subtree the walk goes on into these children itself;
+        # indexing them here would nest one call per directory level
+        if self.index is not None and not self.index.walking:
+            self.index.add_subtree(*children)
+
+    @staticmethod
+    def _node_for(entry: os.DirEntry):
+        try:
+            if entry.is_symlink():
+                stat = entry.stat(follow_symlinks=False)
+                return Symlink(entry.name, os.readlink(entry.path), stat.st_size, stat.st_mtime)
+            if entry.is_dir(follow_symlinks=False):
+                return LazyDirectory(entry.name, entry.path, entry.stat(follow_symlinks=False).st_mtime)
+            stat = entry.stat(follow_symlinks=False)
+            return File(entry.name, os.path.splitext(entry.name)[1][1:], stat.st_size, stat.st_mtime)
+        except FileNotFoundError:  # removed while we were listing
+            return None
+
+
+def load_tree(path: str) -> LazyDirectory:
+    path = os.path.abspath(path)
+    return LazyDirectory(os.path.basename(path) or path, path, os.stat(path).st_mtime)
 
 
 
 class Icriteria:
+    # relative evaluation cost, used by CompiledCriteria to run cheap tests first
+    cost = 10
+
     @abstractmethod
     def apply(self, fileNode):
         pass
 
+    # python expression over `node` equivalent to apply, or None to call apply.
+    # constants go in through bind(value), which returns the name they are
+    # bound to in the generated code, so any value works, not just literals
+    def inline(self, bind):
+        return None
+
+    # hashable key, equal for criteria that match the same files. by default
+    # only the same criteria object is considered equal
+    def fingerprint(self):
+        return (type(self).__name__, self)
+
 class FileNameCriteria(Icriteria):
+    cost = 1
 
     def __init__(self, taget_name: str):
         self.target_name = taget_name
@@ -61,8 +228,15 @@ class FileNameCriteria(Icriteria):
     def apply(self, fileNode: IFileNode):
         return fileNode.get_name()  ==  self.target_name
 
+    def inline(self, bind):
+        return f"node.name == {bind(self.target_name)}"
+
+    def fingerprint(self):
+        return ("name", self.target_name)
+
 
 class GreaterThanSizeCriteria(Icriteria):
+    cost = 1
 
     def __init__(self, target_size: int):
         self.target_size = target_size
@@ -70,8 +244,32 @@ class GreaterThanSizeCriteria(Icriteria):
     def apply(self, fileNode: IFileNode):
         return fileNode.get_size() >= self.target_size
 
+    def inline(self, bind):
+        return f"node.size >= {bind(self.target_size)}"
+
+    def fingerprint(self):
+        return ("size>=", self.target_size)
+
+
+class ExtensionCriteria(Icriteria):
+    cost = 1
+
+    def __init__(self, target_ext: str):
+        self.target_ext = target_ext
+
+    def apply(self, fileNode: IFileNode):
+        return getattr(fileNode, "ext", None) == self.target_ext
+
+    def inline(self, bind):
+        return f"getattr(node, 'ext', None) == {bind(self.target_ext)}"
+
+    def fingerprint(self):
+        return ("ext", self.target_ext)
+
 
 class DefaultCriteria(Icriteria):
+    cost = 0
+
     def apply(self, fileNode):
         return True
     
@@ -110,22 +308,489 @@ class BuildCriteria(Icriteria):
     
     def build(self):
         return self.build_criteria
-    
 
-class Find:
-    def __init__(self):
-        self.result = []
+    def compile(self):
+        return CompiledCriteria(self.build_criteria)
+
+
+# flattens And/Or chains, drops DefaultCriteria tautologies, orders operands
+# cheapest first and generates a single predicate function for apply
+class CompiledCriteria(Icriteria):
+
+    def __init__(self, criteria: Icriteria):
+        if isinstance(criteria, CompiledCriteria):
+            criteria = criteria.criteria
+        elif isinstance(criteria, BuildCriteria):
+            criteria = criteria.build()
+        self.criteria = criteria
+        self.cost = 0
+        namespace = {}
+        self.tree = tree = self._simplify(criteria)
+        self.source = "lambda node: " + self._emit(tree, namespace)
+        self.apply = eval(self.source, namespace)
+
+    # operands are sets: and/or are commutative and idempotent, so the same
+    # query written in another order or with repeats has the same fingerprint
+    def fingerprint(self, tree=None):
+        tree = self.tree if tree is None else tree
+        if tree is True:
+            return ("true",)
+        if isinstance(tree, tuple):
+            op, operands = tree
+            return (op, frozenset(self.fingerprint(operand) for operand in operands))
+        return tree.fingerprint()
+
+    # returns True for a tautology, ("and"|"or", [operands]) or a leaf criteria
+    def _simplify(self, criteria: Icriteria):
+        if isinstance(criteria, DefaultCriteria):
+            return True
+        if isinstance(criteria, CompiledCriteria):
+            return self._simplify(criteria.criteria)
+        if not isinstance(criteria, (AndCriteria, OrCriteria)):
+            return criteria
+        op = "and" if isinstance(criteria, AndCriteria) else "or"
+        operands = []
+        for part in (self._simplify(criteria.criteria1), self._simplify(criteria.criteria2)):
+            if part is True:
+                if op == "or":
+                    return True
+                continue
+            if isinstance(part, tuple) and part[0] == op:
+                operands.extend(part[1])
+            else:
+                operands.append(part)
+        if not operands:
+            return True
+        if len(operands) == 1:
+            return operands[0]
+        # stable sort keeps the written order between equally cheap tests
+        operands.sort(key=self._cost)
+        return (op, operands)
+
+    def _cost(self, tree):
+        if tree is True:
+            return 0
+        if isinstance(tree, tuple):
+            return sum(self._cost(operand) for operand in tree[1])
+        return tree.cost
+
+    def _emit(self, tree, namespace: dict):
+        if tree is True:
+            return "True"
+        if isinstance(tree, tuple):
+            op, operands = tree
+            return "(" + f" {op} ".join(self._emit(operand, namespace) for operand in operands) + ")"
+        def bind(value):
+            name = f"const{len(namespace)}"
+            namespace[name] = value
+            return name
+
+        expression = tree.inline(bind)
+        if expression is not None:
+            return f"({expression})"
+        name = f"apply{len(namespace)}"
+        namespace[name] = tree.apply
+        return f"{name}(node)"
+
+
+# sorted list split into chunks of about `load` keys, so an insert or delete
+# moves at most one chunk instead of shifting the whole list
+class SortedChunks:
+
+    def __init__(self, load: int = 1000):
+        self.load = load
+        self.chunks = []  # sorted lists, each non empty
+        self.maxes = []  # last key of every chunk
+        self.size = 0
+
+    def __len__(self):
+        return self.size
+
+    def update(self, keys: list):
+        keys = sorted(list(self) + keys) if self.size else sorted(keys)
+        self.chunks = [keys[i:i + self.load] for i in range(0, len(keys), self.load)]
+        self.maxes = [chunk[-1] for chunk in self.chunks]
+        self.size = len(keys)
+
+    def add(self, key):
+        if not self.chunks:
+            self.chunks, self.maxes = [[key]], [key]
+        else:
+            i = min(bisect.bisect_left(self.maxes, key), len(self.chunks) - 1)
+            chunk = self.chunks[i]
+            bisect.insort(chunk, key)
+            self.maxes[i] = chunk[-1]
+            if len(chunk) > 2 * self.load:
+                self.chunks[i:i + 1] = [chunk[:self.load], chunk[self.load:]]
+                self.maxes[i:i + 1] = [chunk[self.load - 1], chunk[-1]]
+        self.size += 1
+
+    def remove(self, key):
+        i = bisect.bisect_left(self.maxes, key)
+        chunk = self.chunks[i]
+        del chunk[bisect.bisect_left(chunk, key)]
+        self.size -= 1
+        if chunk:
+            self.maxes[i] = chunk[-1]
+        else:
+            del self.chunks[i]
+            del self.maxes[i]
+
+    # keys >= key, in order
+    def irange(self, key):
+        i = bisect.bisect_left(self.maxes, key)
+        if i == len(self.chunks):
+            return
+        chunk = self.chunks[i]
+        yield from chunk[bisect.bisect_left(chunk, key):]
+        for chunk in self.chunks[i + 1:]:
+            yield from chunk
+
+    def __iter__(self):
+        for chunk in self.chunks:
+            yield from chunk
+
+    def __reversed__(self):
+        for chunk in reversed(self.chunks):
+            yield from reversed(chunk)
+
+
+# secondary indexes over the files of one tree: name and extension hash
+# indexes, and a size index kept sorted for range queries. directories below
+# the root are kept sorted by total size for largest_dirs
+class FileIndex:
+
+    def __init__(self, root: Directory):
+        self.root = root
+        self.by_name = {}  # name -> {id(file): file}
+        self.by_ext = {}  # ext -> {id(file): file}
+        self.sizes = SortedChunks()  # (size, seq)
+        self.size_files = {}  # seq -> file, parallel to self.sizes
+        self.seqs = {}  # id(file) -> (size, seq) key in self.sizes
+        self.dir_sizes = SortedChunks()  # (size, seq)
+        self.size_dirs = {}  # seq -> directory, parallel to self.dir_sizes
+        self.dir_seqs = {}  # id(directory) -> (size, seq) key in self.dir_sizes
+        self._seq = 0
+        self.walking = False  # add_subtree is running; lazy loads leave it to the walk
+
+    def __len__(self):
+        return len(self.seqs)
+
+    # small subtrees go into the size index key by key; big ones (like the
+    # initial build) rebuild it with one sort
+    def add_subtree(self, *nodes: IFileNode):
+        keys, dirs, dir_keys = [], [], []
+        stack = list(nodes)
+        walking, self.walking = self.walking, True
+        try:
+            while stack:
+                node = stack.pop()
+                if node.ftype == Ftype.FILE:
+                    key = self._add_file(node)
+                    if key is not None:
+                        keys.append(key)
+                elif node.ftype == Ftype.DIRECTORY:
+                    node.index = self
+                    dirs.append(node)
+                    stack.extend(node.children)
+        finally:
+            self.walking = walking
+        # keyed only now, as reading children of a LazyDirectory can still
+        # change the totals of the directories above it
+        for node in dirs:
+            if id(node) not in self.dir_seqs:
+                self._seq += 1
+                key = self.dir_seqs[id(node)] = (node.size, self._seq)
+                self.size_dirs[self._seq] = node
+                dir_keys.append(key)
+        self._insert(self.sizes, keys)
+        self._insert(self.dir_sizes, dir_keys)
+
+    @staticmethod
+    def _insert(sorted_keys: SortedChunks, keys: list):
+        if len(keys) * 8 < len(sorted_keys):
+            for key in keys:
+                sorted_keys.add(key)
+        elif keys:
+            sorted_keys.update(keys)
+
+    def remove_subtree(self, node: IFileNode):
+        keys, dir_keys = [], []
+        stack = [node]
+        while stack:
+            node = stack.pop()
+            if node.ftype == Ftype.FILE:
+                key = self._remove_file(node)
+                if key is not None:
+                    keys.append(key)
+            elif node.ftype == Ftype.DIRECTORY:
+                node.index = None
+                key = self.dir_seqs.pop(id(node), None)
+                if key is not None:
+                    del self.size_dirs[key[1]]
+                    dir_keys.append(key)
+                stack.extend(node.children)
+        self.sizes = self._delete(self.sizes, keys)
+        self.dir_sizes = self._delete(self.dir_sizes, dir_keys)
+
+    @staticmethod
+    def _delete(sorted_keys: SortedChunks, keys: list) -> SortedChunks:
+        if len(keys) * 8 < len(sorted_keys):
+            for key in keys:
+                sorted_keys.remove(key)
+            return sorted_keys
+        removed = set(keys)
+        remaining = SortedChunks(sorted_keys.load)
+        remaining.update([key for key in sorted_keys if key not in removed])
+        return remaining
+
+    def resize_file(self, file: File, size: int):
+        key = self.seqs.get(id(file))
+        if key is not None and key[0] != size:
+            self.sizes.remove(key)
+            self.sizes.add((size, key[1]))
+            self.seqs[id(file)] = (size, key[1])
+
+    def resize_dir(self, directory: Directory):
+        key = self.dir_seqs.get(id(directory))
+        if key is not None and key[0] != directory.size:
+            self.dir_sizes.remove(key)
+            self.dir_sizes.add((directory.size, key[1]))
+            self.dir_seqs[id(directory)] = (directory.size, key[1])
+
+    def largest_dirs(self, k: int = 10):
+        result = []
+        for _, seq in reversed(self.dir_sizes):
+            if len(result) == k:
+                break
+            result.append(self.size_dirs[seq])
+        return result
+
+    def _add_file(self, file: File):
+        if id(file) in self.seqs:
+            return None
+        self.by_name.setdefault(file.name, {})[id(file)] = file
+        self.by_ext.setdefault(file.ext, {})[id(file)] = file
+        self._seq += 1
+        key = (file.size, self._seq)
+        self.size_files[self._seq] = file
+        self.seqs[id(file)] = key
+        return key
+
+    def _remove_file(self, file: File):
+        key = self.seqs.pop(id(file), None)
+        if key is None:
+            return None
+        for bucket, value in ((self.by_name, file.name), (self.by_ext, file.ext)):
+            files = bucket[value]
+            del files[id(file)]
+            if not files:
+                del bucket[value]
+        del self.size_files[key[1]]
+        return key
+
+    # candidate files for a CompiledCriteria tree, or None when a scan is needed
+    def candidates(self, tree):
+        if isinstance(tree, FileNameCriteria):
+            return list(self.by_name.get(tree.target_name, {}).values())
+        if isinstance(tree, ExtensionCriteria):
+            return list(self.by_ext.get(tree.target_ext, {}).values())
+        if isinstance(tree, GreaterThanSizeCriteria):
+            return [self.size_files[seq] for _, seq in self.sizes.irange((tree.target_size,))]
+        if isinstance(tree, tuple) and tree[0] == "and":
+            best = None
+            for operand in tree[1]:
+                found = self.candidates(operand)
+                if found is not None and (best is None or len(found) < len(best)):
+                    best = found
+            return best
+        if isinstance(tree, tuple) and tree[0] == "or":
+            merged = {}
+            for operand in tree[1]:
+                found = self.candidates(operand)
+                if found is None:
+                    return None
+                merged.update((id(file), file) for file in found)
+            return list(merged.values())
+        return None
+
+
+# LRU cache of Find results per (directory, criteria fingerprint). an entry
+# is valid while the directory version is the one it was computed at
+class FindCache:
+
+    def __init__(self, capacity: int = 1024):
+        self.capacity = capacity
+        self.entries = OrderedDict()  # (id(directory), fingerprint) -> (directory, version, matches)
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    @property
+    def hit_rate(self):
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def get(self, directory: Directory, fingerprint):
+        key = (id(directory), fingerprint)
+        entry = self.entries.get(key)
+        if entry is not None and entry[0] is directory and entry[1] == directory.version:
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return entry[2]
+        self.misses += 1
+        return None
+
+    def put(self, directory: Directory, fingerprint, matches: list):
+        key = (id(directory), fingerprint)
+        self.entries[key] = (directory, directory.version, matches)
+        self.entries.move_to_end(key)
+        if len(self.entries) > self.capacity:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self):
+        self.entries.clear()
 
-    def find_api(self, root: IFileNode, criteria: Icriteria):
-        self.find_helper(root, criteria)
-        return self.result
-            
-    def find_helper(self, root: IFileNode, criteria: Icriteria):
+
+class Find:
+    # with a FindCache, unlimited queries cache the matches of the root and
+    # of directories up to cache_depth levels below it, so a change deep in
+    # the tree only recomputes the directories on its path
+    def __init__(self, cache: FindCache = None, cache_depth: int = 2):
+        self.cache = cache
+        self.cache_depth = cache_depth
+
+    def find_api(self, root: IFileNode, criteria: Icriteria, limit: int = None):
+        if self.cache is not None and limit is None and root.ftype == Ftype.DIRECTORY:
+            compiled = criteria if isinstance(criteria, CompiledCriteria) else CompiledCriteria(criteria)
+            indexed = root.index is not None and root.index.root is root
+            depth = 0 if indexed else self.cache_depth
+            return list(self._find_cached(root, compiled, compiled.fingerprint(), depth))
+        return list(self.find_iter(root, criteria, limit))
+
+    def _find_cached(self, directory: Directory, compiled: CompiledCriteria, fingerprint, depth: int):
+        matches = self.cache.get(directory, fingerprint)
+        if matches is not None:
+            return matches
+        if depth == 0:
+            matches = list(self.find_iter(directory, compiled))
+        else:
+            matches, apply = [], compiled.apply
+            for node in directory.children:
+                if node.ftype == Ftype.FILE:
+                    if apply(node):
+                        matches.append(node)
+                elif node.ftype == Ftype.DIRECTORY:
+                    matches.extend(self._find_cached(node, compiled, fingerprint, depth - 1))
+        self.cache.put(directory, fingerprint, matches)
+        return matches
+
+    # no recursion, so tree depth is not bounded by the recursion limit.
+    # when root carries its own FileIndex and the criteria can use it, matches
+    # come from the index instead of a scan, sorted back into tree order.
+    # sorting costs more than the scan once the candidates are a sizable
+    # share of the files, so those queries scan
+    def find_iter(self, root: IFileNode, criteria: Icriteria, limit: int = None):
+        if limit is not None and limit <= 0:
+            return
+        found = 0
         if root.ftype == Ftype.FILE:
-            self.result += [root] if criteria.apply(root) else []
+            if criteria.apply(root):
+                yield root
             return
-        for child in root.children:
-            self.find_helper(child, criteria)
+        if root.ftype == Ftype.DIRECTORY and root.index is not None and root.index.root is root:
+            compiled = criteria if isinstance(criteria, CompiledCriteria) else CompiledCriteria(criteria)
+            candidates = root.index.candidates(compiled.tree)
+            if candidates is not None and len(candidates) * 16 <= len(root.index):
+                apply = compiled.apply
+                matches = [node for node in candidates if apply(node)]
+                key = lambda node: self._tree_path(root, node)
+                if limit is None or limit >= len(matches):
+                    matches.sort(key=key)
+                else:
+                    matches = heapq.nsmallest(limit, matches, key=key)
+                yield from matches
+                return
+        file_type, apply = Ftype.FILE, criteria.apply
+        stack = [iter(root.children)]
+        while stack:
+            for node in stack[-1]:
+                if node.ftype is not file_type:
+                    stack.append(iter(node.children))
+                    break
+                if apply(node):
+                    yield node
+                    found += 1
+                    if found == limit:
+                        return
+            else:
+                stack.pop()
+
+    # child positions from root down to node; comparing these orders nodes
+    # as the depth first walk visits them
+    @staticmethod
+    def _tree_path(root: Directory, node: IFileNode) -> tuple:
+        path = []
+        while node is not root:
+            path.append(node.position)
+            node = node.parent
+        path.reverse()
+        return tuple(path)
+
+    # splits the top level children across forked worker processes; workers
+    # inherit the tree and send back index paths, so no nodes are pickled
+    def find_parallel(self, root: IFileNode, criteria: Icriteria, workers: int = None):
+        workers = workers or os.cpu_count() or 1
+        if root.ftype == Ftype.FILE or workers <= 1 or \
+                "fork" not in multiprocessing.get_all_start_methods():
+            return self.find_api(root, criteria)
+        global _shared_search
+        top = list(root.children)
+        _shared_search = (top, criteria)
+        try:
+            with multiprocessing.get_context("fork").Pool(workers) as pool:
+                chunks = pool.map(_find_subtree_paths, range(len(top)), chunksize=1)
+        finally:
+            _shared_search = None
+        result, listed = [], {id(root): top}  # id(directory) -> list of its children
+        for paths in chunks:
+            for path in paths:
+                node = root
+                for index in path:
+                    children = listed.get(id(node))
+                    if children is None:
+                        children = listed[id(node)] = list(node.children)
+                    node = children[index]
+                result.append(node)
+        return result
+
+
+_shared_search = None
+
+
+def _find_subtree_paths(index: int):
+    top, criteria = _shared_search
+    node = top[index]
+    if node.ftype == Ftype.FILE:
+        return [(index,)] if criteria.apply(node) else []
+    paths, path = [], [index]
+    stack = [enumerate(node.children)]
+    while stack:
+        for position, child in stack[-1]:
+            if child.ftype != Ftype.FILE:
+                path.append(position)
+                stack.append(enumerate(child.children))
+                break
+            if criteria.apply(child):
+                paths.append((*path, position))
+        else:
+            stack.pop()
+            path.pop()
+    return paths
     
 
 
@@ -6,9 +6,15 @@ Hand   5 cards
 Rule   interface (pair, three of a kind, flush)
 Game   evaluate the hand with best rule
 """
+import math
+import multiprocessing
+import os
+import random
 from abc import ABC,ABCMeta,abstractmethod
-from collections import defaultdict
+from array import array
 from enum import Enum
+from itertools import combinations, combinations_with_replacement
+from threading import Lock
 
 
 class RuleName(Enum):
@@ -16,10 +22,34 @@ class RuleName(Enum):
     ThreeOfAKind = "THREE OF A KIND"
     Flush = "FLUSH"
 
+# card values 0-15 map to primes, so the product over a hand identifies the
+# multiset of its values whatever the card order
+VALUE_PRIMES = (2, 3, 5, 7, 11, 13, 17, 19, 23, 29, 31, 37, 41, 43, 47, 53)
+SUIT_BITS = {}  # symbol -> one hot suit bit, assigned on first use, at most 16
+_SUIT_BITS_LOCK = Lock()  # cards can be created from several threads
+
+
+# packed card: value prime in bits 0-7, one hot suit in bits 8-23, value in
+# bits 24-27. 0 when the card can't be packed (value or suit out of range)
+def pack_card(value, symbol) -> int:
+    if not isinstance(value, int) or not 0 <= value < len(VALUE_PRIMES):
+        return 0
+    suit = SUIT_BITS.get(symbol)
+    if suit is None:
+        with _SUIT_BITS_LOCK:
+            suit = SUIT_BITS.get(symbol)
+            if suit is None:
+                if len(SUIT_BITS) == 16:
+                    return 0
+                suit = SUIT_BITS[symbol] = 1 << len(SUIT_BITS)
+    return VALUE_PRIMES[value] | suit << 8 | value << 24
+
+
 class Card:
     def __init__(self, value, symbol):
         self.__value = value
         self.__symbol = symbol
+        self.bits = pack_card(value, symbol)
     
     def get_value(self):
         return self.__value
@@ -35,6 +65,11 @@ class Hand():
         self.limit = limit
         self.size = 0 # can remove this and use len(self.__hand)
         self.__hand = [] # hold cards
+        # running encoding of the cards, see rank_key
+        self.prime_product = 1
+        self.suit_mask = 0xFFFF
+        self.packed = True
+        self.__histogram = None
 
     def get_card(self,index) -> Card:
         if index > self.size:
@@ -45,110 +80,500 @@ class Hand():
         if self.size < self.limit:
             self.__hand.append(card)
             self.size += 1
+            self.__histogram = None
+            if card.bits:
+                self.prime_product *= card.bits & 0xFF
+                self.suit_mask &= card.bits >> 8
+            else:
+                self.packed = False
         else:
             raise ValueError(f"Exceeding hand limit of {self.limit} cards")
         
+    # value multiset and flush bit in one int, or None if a card isn't packed
+    def rank_key(self):
+        if not self.packed:
+            return None
+        return self.prime_product << 1 | (self.size > 0 and self.suit_mask != 0)
+
+    # counts every rule reads, built in one pass and reused until a card is added
+    def histogram(self) -> "HandHistogram":
+        histogram = self.__histogram
+        if histogram is None:
+            histogram = self.__histogram = HandHistogram(self.__hand)
+        return histogram
+
+    # a fresh iterator each time, so several threads can walk the same hand
     def __iter__(self):
-        self.it = 0
-        return self
-    
-    def __next__(self):
-        if self.it == self.size:
-            raise StopIteration
-        self.it += 1
-        return self.__hand[self.it-1]
+        return iter(self.__hand)
     
     def __repr__(self):
         repr = ", ".join(str(card) for card in self.__hand)
         return repr
 
 
+class HandHistogram:
+    def __init__(self, cards: list[Card]):
+        self.value_counts = {}
+        self.symbol_counts = {}
+        for card in cards:
+            value, symbol = card.get_value(), card.get_symbol()
+            self.value_counts[value] = self.value_counts.get(value, 0) + 1
+            self.symbol_counts[symbol] = self.symbol_counts.get(symbol, 0) + 1
+        self.max_of_a_kind = max(self.value_counts.values(), default=0)
+
+
 class SingletonMeta(ABCMeta):
     __instances = {}
+    __lock = Lock()
     def __call__(cls, *args, **kwargs):
         if cls not in cls.__instances:
-            cls.__instances[cls] = super().__call__(*args, **kwargs)
+            with cls.__lock:
+                if cls not in cls.__instances:
+                    cls.__instances[cls] = super().__call__(*args, **kwargs)
         return cls.__instances[cls]
 
 
     
 
+# rules hold no state: evaluate reads the hand's shared histogram, so one
+# singleton rule can score any number of hands, from any number of threads
 class IRule(ABC, metaclass = SingletonMeta):
+    # subclasses define matches(histogram), which gets the hand's histogram,
+    # or override evaluate(hand); a rule with neither fails when defined
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        if cls.evaluate is IRule.evaluate and not callable(getattr(cls, "matches", None)):
+            raise TypeError(f"{cls.__name__} must override evaluate or define matches")
+
     @abstractmethod
     def get_rule(self) -> RuleName:
         pass
     
     # checks whether rule is satisfied
-    @abstractmethod
     def evaluate(self, hand: Hand) -> bool:
-        pass
+        return self.matches(hand.histogram())
         
 
 class Pair(IRule):
-    def __init__(self):
-        self.val_map = defaultdict(int)
-
     def get_rule(self):
         return RuleName.Pair
     
-    def evaluate(self, hand: Hand):
-        for card in hand:
-            val =  card.get_value()
-            self.val_map[val] += 1
-            if self.val_map[val] >= 2:
-                return True
-        return False
+    def matches(self, histogram: HandHistogram):
+        return histogram.max_of_a_kind >= 2
     
 class ThreeOfAKind(IRule):
-    def __init__(self):
-        self.val_map = defaultdict(int)
-
     def get_rule(self):
         return RuleName.ThreeOfAKind
     
-    def evaluate(self, hand: Hand):
-        for card in hand:
-            val =  card.get_value()
-            self.val_map[val] += 1
-            if self.val_map[val] >= 3:
-                return True
-        return False
+    def matches(self, histogram: HandHistogram):
+        return histogram.max_of_a_kind >= 3
     
 class Flush(IRule):
-    def __init__(self):
-        self.symbols = set()
     def get_rule(self):
         return RuleName.Flush
 
-    def evaluate(self, hand: Hand):
-        for card in hand:
-            self.symbols.add(card.get_symbol())
-        return len(self.symbols) == 1
+    def matches(self, histogram: HandHistogram):
+        return len(histogram.symbol_counts) == 1
     
 
+# max number of cards sharing a value, by prime product, for every 5 card
+# hand; other hand sizes are added the first time they are looked up
+def _five_card_max_of_a_kind():
+    table = {}
+    for values in combinations_with_replacement(range(len(VALUE_PRIMES)), 5):
+        product = 1
+        for value in values:
+            product *= VALUE_PRIMES[value]
+        table[product] = max(values.count(value) for value in values)
+    return table
+
+
+MAX_OF_A_KIND = _five_card_max_of_a_kind()
+
+
+def max_of_a_kind(product: int) -> int:
+    count = MAX_OF_A_KIND.get(product)
+    if count is None:
+        count, rest = 0, product
+        for prime in VALUE_PRIMES:
+            power = 0
+            while rest % prime == 0:
+                rest //= prime
+                power += 1
+            count = max(count, power)
+        MAX_OF_A_KIND[product] = count
+    return count
+
+
+# rank_key -> feature class of the hand: max of a kind (capped at 3, as no
+# rule looks further) shifted left once, | the flush bit. it doesn't depend on
+# the rules, so one table serves every rule set; other hand sizes are added
+# the first time they are looked up
+FEATURE_CLASSES = {product << 1 | flush: min(count, 3) << 1 | flush
+                   for product, count in MAX_OF_A_KIND.items() for flush in (0, 1)}
+
+
+def feature_class(key: int) -> int:
+    features = FEATURE_CLASSES.get(key)
+    if features is None:
+        features = FEATURE_CLASSES[key] = min(max_of_a_kind(key >> 1), 3) << 1 | key & 1
+    return features
+
+
+# rank_key -> (best RuleName, rank), None when nothing matches, for one rule
+# set. the winner is resolved once per feature class, so making a table is a
+# few rule checks and a lookup is two list/dict reads. only the built-in
+# rule classes themselves are tabled: a subclass may override matches or
+# evaluate while keeping their RuleName
+class RankTable:
+
+    @classmethod
+    def for_rules(cls, rules: dict[IRule, int]):
+        if any(type(rule) not in cls._features for rule in rules):
+            return None  # custom rules are evaluated one by one
+        return cls(tuple((type(rule), rule.get_rule(), rank) for rule, rank in rules.items()))
+
+    def __init__(self, plan: tuple):
+        self.plan = plan
+        self.outcomes = [self._best(count, flush) for count in range(4) for flush in (0, 1)]
+
+    def lookup(self, key: int):
+        features = FEATURE_CLASSES.get(key)
+        if features is None:
+            features = feature_class(key)
+        return self.outcomes[features]
+
+    def _best(self, count: int, flush: int):
+        win_rule, win_rank = None, float('inf')
+        for rule_type, name, rank in self.plan:
+            if self._features[rule_type](count, flush) and rank < win_rank:
+                win_rule, win_rank = name, rank
+        return (win_rule, win_rank) if win_rule else None
+
+    _features = {
+        Pair: lambda count, flush: count >= 2,
+        ThreeOfAKind: lambda count, flush: count >= 3,
+        Flush: lambda count, flush: flush == 1,
+    }
+
+
+# rules sorted by rank, best first, plus the RankTable when there is one.
+# shared by every Game with the same rules and ranks, so a Game per hand
+# doesn't sort the rule set again. the sort is stable: between equal ranks
+# the rule set first still wins. at most `capacity` rule sets are kept, the
+# oldest dropped first, so rule sets made per request don't pile up. hits
+# don't reorder: the key is hashed once per lookup, which for a large rule
+# set costs as much as the rest of the lookup
+class RulePlan:
+    capacity = 64
+    _plans = {}  # tuple(rules.items()) -> RulePlan, oldest first
+    _lock = Lock()
+
+    @classmethod
+    def for_rules(cls, rules: dict[IRule, int]):
+        key = tuple(rules.items())
+        plan = cls._plans.get(key)
+        if plan is None:
+            plan = cls(rules)
+            with cls._lock:
+                cls._plans[key] = plan
+                while len(cls._plans) > cls.capacity:
+                    del cls._plans[next(iter(cls._plans))]
+        return plan
+
+    def __init__(self, rules: dict[IRule, int]):
+        self.rules = sorted(((rank, rule) for rule, rank in rules.items()), key=lambda item: item[0])
+        self.table = RankTable.for_rules(rules)
+
+
+class HandResult:
+    def __init__(self, hand: Hand, rule: RuleName = None, rank: int = None):
+        self.hand = hand
+        self.rule = rule  # None when no rule matches
+        self.rank = rank
+
+    def __repr__(self):
+        if self.rule is None:
+            return f"no winning rules exist for {self.hand}"
+        return f"{self.hand} is {getattr(self.rule, 'value', self.rule)}"
+
+
 class Game:
     def __init__(self, hand):
         self.__hand = hand
         self.rules : dict[IRule, int]
+        self.plan = []
+        self.table = None
 
     # rank starts from 1
     def set_rules(self, rule_rank : dict[IRule, int]):
         self.rules = rule_rank
+        self._plan()
 
     # we will give lucky rule 0 rank
     def set_lucky_rule(self, rule):
         self.rules[rule] = 0
+        self._plan()
 
-    def evaluate_hand(self):
-        win_rule, win_rank = None, float('inf')
-        for rule, rank in self.rules.items():
-            if rule.evaluate(self.__hand) and rank < win_rank:
-                win_rule = rule.get_rule()
-                win_rank = rank
-        if win_rule:
-            print(f"{self.__hand} is {win_rule.value}")
-        else:
-            print(f"no winning rules exist for {self.__hand}")
+    def _plan(self):
+        plan = RulePlan.for_rules(self.rules)
+        self.plan, self.table = plan.rules, plan.table
+
+    # built-in rules with packed cards are one RankTable lookup; anything else
+    # walks the plan and stops at the first match, which no later rule can beat
+    def evaluate_hand(self) -> HandResult:
+        key = self.__hand.rank_key() if self.table is not None else None
+        if key is not None:
+            match = self.table.lookup(key)
+            return HandResult(self.__hand, *match) if match else HandResult(self.__hand)
+        for rank, rule in self.plan:
+            if rule.evaluate(self.__hand):
+                return HandResult(self.__hand, rule.get_rule(), rank)
+        return HandResult(self.__hand)
+
+    # name of the best matching rule, or None; evaluate_hand without the result
+    def best_rule(self):
+        key = self.__hand.rank_key() if self.table is not None else None
+        if key is not None:
+            match = self.table.lookup(key)
+            return match[0] if match else None
+        for _, rule in self.plan:
+            if rule.evaluate(self.__hand):
+                return rule.get_rule()
+        return None
+
+
+NO_RANK = -1  # batch rank for a hand no rule matches
+
+# many hands stored column wise: values[i] / suits[i] hold card i of every
+# hand, one byte per hand. suits are small integer codes, not symbols
+class HandBatch:
+    def __init__(self, values: bytes, suits: bytes, hand_size: int = 5):
+        if len(values) != len(suits) or len(values) % hand_size:
+            raise ValueError(f"values and suits must hold the same whole number of {hand_size} card hands")
+        if values and max(values) > 127:
+            raise ValueError("card values must be below 128")
+        if suits and max(suits) > 127:
+            raise ValueError("suit codes must be below 128")
+        self.hand_size = hand_size
+        self.size = len(values) // hand_size
+        self.values = [bytes(values[i::hand_size]) for i in range(hand_size)]
+        self.suits = [bytes(suits[i::hand_size]) for i in range(hand_size)]
+
+    @classmethod
+    def from_hands(cls, hands: list[Hand]):
+        values, suits, codes = bytearray(), bytearray(), {}
+        hand_size = hands[0].size if hands else 5
+        for hand in hands:
+            if hand.size != hand_size:
+                raise ValueError(f"all hands must have {hand_size} cards")
+            for card in hand:
+                values.append(card.get_value())
+                suits.append(codes.setdefault(card.get_symbol(), len(codes)))
+        if len(codes) > 127:
+            raise ValueError("at most 127 distinct symbols")
+        return cls(values, suits, hand_size)
+
+
+# scores a whole HandBatch at once. every column is read as one big integer
+# with a byte lane per hand, so each comparison below is a single C level
+# operation over the batch instead of a python loop over hands (numpy is not
+# a dependency of this module, python ints do the lane arithmetic). kernels
+# exist for the built-in rule classes only, not for subclasses of them
+class BatchEvaluator:
+    def __init__(self, rules: dict[IRule, int]):
+        for rule, rank in rules.items():
+            if type(rule) not in self._kernels:
+                raise ValueError(f"no batch evaluation for {type(rule).__name__}")
+            if not 0 <= rank <= 126:
+                raise ValueError(f"batch ranks must be within 0-126, got {rank}")
+        # worst rank first, so the best matching rule is written last
+        self.plan = sorted(((rank, type(rule)) for rule, rank in rules.items()), key=lambda item: -item[0])
+
+    # rank of the best matching rule per hand, NO_RANK where none match
+    def evaluate(self, batch: HandBatch) -> array:
+        n = batch.size
+        ones = int.from_bytes(b"\x01" * n, "little")
+        lanes = _Lanes(ones)
+        values = [int.from_bytes(column, "little") for column in batch.values]
+        suits = [int.from_bytes(column, "little") for column in batch.suits]
+        features = {}
+        result = ones * 0xFF  # NO_RANK in every lane
+        for rank, rule_type in self.plan:
+            if rule_type not in features:
+                features[rule_type] = self._kernels[rule_type](lanes, values, suits)
+            full = lanes.fill(features[rule_type])
+            result = (result & ~full) | (ones * rank & full)
+        ranks = array("b")
+        ranks.frombytes(result.to_bytes(n, "little"))
+        return ranks
+
+    @staticmethod
+    def _pair(lanes, values, suits):
+        mask = 0
+        for a, b in combinations(values, 2):
+            mask |= lanes.equal(a, b)
+        return mask
+
+    @staticmethod
+    def _three_of_a_kind(lanes, values, suits):
+        mask = 0
+        for a, b, c in combinations(values, 3):
+            mask |= lanes.equal(a, b) & lanes.equal(a, c)
+        return mask
+
+    @staticmethod
+    def _flush(lanes, values, suits):
+        mask = lanes.high
+        for other in suits[1:]:
+            mask &= lanes.equal(suits[0], other)
+        return mask
+
+    _kernels = {
+        Pair: _pair,
+        ThreeOfAKind: _three_of_a_kind,
+        Flush: _flush,
+    }
+
+
+# byte lane arithmetic on python ints; lane values stay below 0x80 so the
+# top bit of a lane can carry the result without spilling into the next lane
+class _Lanes:
+    def __init__(self, ones: int):
+        self.low = ones * 0x7F
+        self.high = ones * 0x80
+
+    # 0x80 in the lanes where a == b, 0 elsewhere
+    def equal(self, a: int, b: int) -> int:
+        return ((a ^ b) + self.low) & self.high ^ self.high
+
+    # widens 0x80 lanes to 0xFF
+    def fill(self, mask: int) -> int:
+        return (mask >> 7) * 0xFF
+
+
+class Deck:
+    def __init__(self, values=range(1, 11), symbols="AB"):
+        self.cards = [Card(value, symbol) for value in values for symbol in symbols]
+
+    # the deck without the given cards, matched by value and symbol
+    def without(self, cards: list[Card]) -> list[Card]:
+        rest = list(self.cards)
+        for card in cards:
+            for i, candidate in enumerate(rest):
+                if candidate.get_value() == card.get_value() and candidate.get_symbol() == card.get_symbol():
+                    del rest[i]
+                    break
+            else:
+                raise ValueError(f"{card} is not in the deck")
+        return rest
+
+
+class EquityEstimate:
+    def __init__(self, trials: int, wins: int, ties: int, share: float, share_sq: float):
+        self.trials = trials
+        self.wins = wins
+        self.ties = ties
+        self.equity = share / trials if trials else 0.0
+        variance = share_sq / trials - self.equity ** 2 if trials > 1 else 0.0
+        self.std_error = math.sqrt(max(variance, 0.0) / trials) if trials > 1 else float('inf')
+
+    # half width of the 95% confidence interval around equity
+    @property
+    def margin(self):
+        return 1.96 * self.std_error
+
+    def __repr__(self):
+        return f"equity {self.equity:.4f} +/- {self.margin:.4f} over {self.trials} trials"
+
+
+# estimates the equity of a hand (the hero's known cards, completed at
+# random) against `opponents` random hands: a win scores 1, a k way tie for
+# the best rank 1/k. hands are scored through Game with the given rules, a
+# lower rank beats a higher one and no matching rule loses to any match.
+# trials run in chunks on a process pool; every chunk has its own seed drawn
+# from `seed`, so a result depends on seed and chunk size, not on workers
+class EquitySimulator:
+    def __init__(self, rules: dict[IRule, int], hero_cards: list[Card] = (), opponents: int = 1,
+                 deck: Deck = None, hand_size: int = 5, seed: int = 0):
+        self.rules = rules
+        self.hero_cards = list(hero_cards)
+        self.opponents = opponents
+        self.hand_size = hand_size
+        self.seed = seed
+        self.rest = (deck or Deck()).without(self.hero_cards)
+        self.draw = hand_size - len(self.hero_cards) + opponents * hand_size
+        if len(self.hero_cards) > hand_size or self.draw > len(self.rest):
+            raise ValueError(f"can't deal {opponents} opponents from {len(self.rest)} remaining cards")
+
+    def rank(self, cards: list[Card]) -> float:
+        hand = Hand(self.hand_size)
+        for card in cards:
+            hand.add_card(card)
+        game = Game(hand)
+        game.set_rules(self.rules)
+        result = game.evaluate_hand()
+        return result.rank if result.rule is not None else float('inf')
+
+    # (trials, wins, ties, sum of shares, sum of squared shares)
+    def run_chunk(self, seed: int, trials: int) -> tuple:
+        rng = random.Random(seed)
+        size, hero_needs = self.hand_size, self.hand_size - len(self.hero_cards)
+        wins = ties = 0
+        share = share_sq = 0.0
+        for _ in range(trials):
+            dealt = rng.sample(self.rest, self.draw)
+            hero = self.rank(self.hero_cards + dealt[:hero_needs])
+            tied = 1
+            for start in range(hero_needs, self.draw, size):
+                other = self.rank(dealt[start:start + size])
+                if other < hero:
+                    break
+                if other == hero:
+                    tied += 1
+            else:
+                if tied == 1:
+                    wins += 1
+                    share += 1.0
+                    share_sq += 1.0
+                else:
+                    ties += 1
+                    share += 1.0 / tied
+                    share_sq += 1.0 / tied ** 2
+        return trials, wins, ties, share, share_sq
+
+    # yields the running estimate after every chunk, in chunk order
+    def simulate_iter(self, trials: int, chunk_size: int = 10_000, workers: int = None):
+        seeds = random.Random(self.seed)
+        tasks = []
+        for start in range(0, trials, chunk_size):
+            tasks.append((self, seeds.getrandbits(64), min(chunk_size, trials - start)))
+        workers = workers or os.cpu_count() or 1
+        totals = [0, 0, 0, 0.0, 0.0]
+        if workers == 1:
+            chunks = (_run_equity_chunk(task) for task in tasks)
+            yield from self._accumulate(totals, chunks)
+            return
+        with multiprocessing.Pool(min(workers, len(tasks) or 1)) as pool:
+            yield from self._accumulate(totals, pool.imap(_run_equity_chunk, tasks))
+
+    def simulate(self, trials: int, chunk_size: int = 10_000, workers: int = None) -> EquityEstimate:
+        estimate = EquityEstimate(0, 0, 0, 0.0, 0.0)
+        for estimate in self.simulate_iter(trials, chunk_size, workers):
+            pass
+        return estimate
+
+    @staticmethod
+    def _accumulate(totals: list, chunks):
+        for chunk in chunks:
+            for i, value in enumerate(chunk):
+                totals[i] += value
+            yield EquityEstimate(*totals)
+
+
+def _run_equity_chunk(task: tuple) -> tuple:
+    simulator, seed, trials = task
+    return simulator.run_chunk(seed, trials)
 
 
 if __name__ == "__main__":
@@ -165,7 +590,7 @@ if __name__ == "__main__":
         Pair(): 3,
     })
     # game.set_lucky_rule(Pair())
-    game.evaluate_hand()
+    print(game.evaluate_hand())
 
                 
             
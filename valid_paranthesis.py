@@ -1,3 +1,4 @@
+import re
 from abc import ABC, abstractmethod
 
 class BracketService(ABC):
@@ -14,6 +15,11 @@ class BracketService(ABC):
     def get_open_bracket():
         pass
 
+    # every (open, close) pair when the service can list them, else None.
+    # lets StreamingParanthesisChecker use its fast path
+    def pairs(self):
+        return None
+
 
 class RegularBracketService(BracketService):
     def __init__(self):
@@ -32,6 +38,9 @@ class RegularBracketService(BracketService):
     
     def get_open_bracket(self, ch):
         return self.mapping[ch]
+
+    def pairs(self):
+        return [(open, close) for close, open in self.mapping.items()]
     
 def console_output(func):
     def wrapper(*args):
@@ -69,6 +78,129 @@ class ParanthesisChecker:
                 self._stack.pop()
         
         return len(self._stack) == 0
+
+
+# validates input fed chunk by chunk (text, or bytes read as latin-1 so
+# offsets are byte offsets). between chunks it keeps only the open brackets,
+# one byte per nesting level, and the offset, so memory follows nesting
+# depth, not input size. error_offset is where the input first goes wrong:
+# the bad character, or the end of input when brackets are left open
+class StreamingParanthesisChecker:
+    def __init__(self, bracket_service : BracketService):
+        self.bracket_service = bracket_service
+        self._codes = {}  # open bracket -> stack byte
+        self._close_to_code = None  # close bracket -> stack byte, when pairs are known
+        self._pairs = []  # "()" style strings removed by the fast path
+        self._shape = None
+        pairs = bracket_service.pairs()
+        if pairs:
+            for open, close in pairs:
+                self._code(open)
+                self._pairs.append(open + close)
+            self._close_to_code = {close: self._codes[open] for open, close in pairs}
+            opens = "".join(open for open, _ in pairs)
+            closes = "".join(close for _, close in pairs)
+            self._shape = re.compile(f"([{re.escape(closes)}]*)([{re.escape(opens)}]*)")
+            self._open_codes = str.maketrans({open: chr(self._codes[open]) for open, _ in pairs})
+            self._close_codes = str.maketrans({close: chr(self._codes[open]) for open, close in pairs})
+        self.clear()
+
+    def clear(self):
+        self._stack = bytearray()
+        self.offset = 0
+        self.error_offset = None
+
+    @property
+    def depth(self):
+        return len(self._stack)
+
+    # False once the input seen so far can't be valid
+    def feed(self, chunk) -> bool:
+        if self.error_offset is not None:
+            return False
+        if not isinstance(chunk, str):
+            chunk = bytes(chunk).decode("latin-1")
+        if not (self._shape and self._feed_reduced(chunk)):
+            error = self._scan(chunk)
+            if error >= 0:
+                self.error_offset = self.offset + error
+                return False
+        self.offset += len(chunk)
+        return True
+
+    def finish(self) -> bool:
+        if self.error_offset is None and self._stack:
+            self.error_offset = self.offset
+        return self.error_offset is None
+
+    # reads a file object (read) or a socket (recv) to the end
+    def validate_stream(self, stream, chunk_size: int = 1 << 20) -> bool:
+        read = stream.read if hasattr(stream, "read") else stream.recv
+        while True:
+            chunk = read(chunk_size)
+            if not chunk:
+                return self.finish()
+            if not self.feed(chunk):
+                return False
+
+    # fast path, all C level string work: drop adjacent matched pairs until
+    # only closers then openers are left, check the closers against the top
+    # of the stack and push the openers. False, with the stack untouched,
+    # when the chunk doesn't fit the stack, or stops shrinking fast enough to
+    # be worth more passes (deep nesting inside one chunk)
+    def _feed_reduced(self, chunk: str) -> bool:
+        while chunk:
+            size = len(chunk)
+            for pair in self._pairs:
+                chunk = chunk.replace(pair, "")
+            if (size - len(chunk)) * 16 < size:
+                break
+        shape = self._shape.fullmatch(chunk)
+        if shape is None:
+            return False
+        closes, opens = shape.groups()
+        if closes:
+            stack = self._stack
+            if len(closes) > len(stack):
+                return False
+            if stack[-len(closes):][::-1] != closes.translate(self._close_codes).encode("latin-1"):
+                return False
+            del stack[-len(closes):]
+        self._stack += opens.translate(self._open_codes).encode("latin-1")
+        return True
+
+    # character by character; index of the first bad character, or -1
+    def _scan(self, chunk: str) -> int:
+        stack = self._stack
+        if self._close_to_code is not None:
+            opens, closes = self._codes, self._close_to_code
+            for i, char in enumerate(chunk):
+                code = opens.get(char)
+                if code is not None:
+                    stack.append(code)
+                elif stack and closes.get(char) == stack[-1]:
+                    stack.pop()
+                else:
+                    return i
+            return -1
+        service, code = self.bracket_service, self._code
+        for i, char in enumerate(chunk):
+            if service.is_valid_open(char):
+                stack.append(code(char))
+            elif stack and service.is_valid_close(char) and \
+                    code(service.get_open_bracket(char)) == stack[-1]:
+                stack.pop()
+            else:
+                return i
+        return -1
+
+    def _code(self, open: str) -> int:
+        code = self._codes.get(open)
+        if code is None:
+            if len(self._codes) == 256:
+                raise ValueError("at most 256 kinds of open bracket")
+            code = self._codes[open] = len(self._codes)
+        return code
     
     
 